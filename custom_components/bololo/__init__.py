@@ -4,16 +4,37 @@
 """
 import logging
 import os
+from datetime import timedelta
 
+import voluptuous as vol
 from homeassistant.components.http import StaticPathConfig
-from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
-from homeassistant.helpers import device_registry as dr
+from homeassistant.config_entries import ConfigEntry, ConfigEntryState
+from homeassistant.const import EVENT_HOMEASSISTANT_CLOSE
+from homeassistant.core import Event, HomeAssistant, ServiceCall, callback
+from homeassistant.exceptions import ConfigEntryNotReady, HomeAssistantError, ServiceValidationError
+from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers.event import async_track_time_interval
 
-from .const import DOMAIN, SERVICE_ADD_DEVICE, SERVICE_REMOVE_DEVICE, SERVICE_REDISCOVER, FIELD_NAME_MOBILE
-from .api_client import BololoApiClient
-from .device_type import BololoDeviceType, get_device_type_by_product_key
-from .disinfection_cabinet import BololoDisinfectionCabinet
+from .const import (
+    DOMAIN,
+    SERVICE_ADD_DEVICE,
+    SERVICE_REMOVE_DEVICE,
+    SERVICE_REDISCOVER,
+    ATTR_DID,
+    ATTR_CONFIG_ENTRY_ID,
+    FIELD_NAME_APP_KEY,
+    FIELD_NAME_MOBILE,
+    FIELD_NAME_PUSH_MODE,
+    FIELD_NAME_MQTT_BROKER,
+    STARTUP_REFRESH_JITTER,
+    REDISCOVERY_INTERVAL,
+)
+from .api_client import BololoApiClient, BololoApiClientError, create_client_session
+from .coordinator import BololoDataUpdateCoordinator
+from .device_cache import BololoDeviceCache
+from .discovery import BololoDeviceDiscovery
+from .runtime_data import BololoConfigEntry, BololoRuntimeData
+from .token_manager import BololoTokenManager
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -35,67 +56,228 @@ async def async_setup(hass: HomeAssistant, config: dict):
     )
 
     _LOGGER.debug("call async_setup , bololo icons path register : %s", icons_path)
+
+    _async_register_services(hass)
     return True
 
 
-async def async_setup_entry(hass: HomeAssistant, config_entry: ConfigEntry):
+def _get_discoveries(hass: HomeAssistant, call: ServiceCall) -> list[BololoDeviceDiscovery]:
+    """服务调用涉及的配置条目的设备发现，未指定配置条目时返回全部已加载的配置条目"""
+    config_entry_id = call.data.get(ATTR_CONFIG_ENTRY_ID)
+    if config_entry_id is None:
+        config_entries = hass.config_entries.async_entries(DOMAIN)
+    else:
+        config_entry = hass.config_entries.async_get_entry(config_entry_id)
+        if config_entry is None or config_entry.domain != DOMAIN or config_entry.state is not ConfigEntryState.LOADED:
+            raise ServiceValidationError(f"bololo config entry {config_entry_id} is not loaded")
+        config_entries = [config_entry]
+    return [
+        config_entry.runtime_data.discovery
+        for config_entry in config_entries
+        if config_entry.state is ConfigEntryState.LOADED
+    ]
+
+
+def _async_register_services(hass: HomeAssistant) -> None:
+    """注册设备增删和重新发现服务"""
+
+    async def _async_add_device(call: ServiceCall) -> None:
+        did = call.data[ATTR_DID]
+        for discovery in _get_discoveries(hass, call):
+            try:
+                if await discovery.async_add_device(did):
+                    return
+            except BololoApiClientError as err:
+                raise HomeAssistantError(f"rediscover bololo devices failed: {err}") from err
+        raise ServiceValidationError(f"bololo device {did} not found")
+
+    async def _async_remove_device(call: ServiceCall) -> None:
+        did = call.data[ATTR_DID]
+        for discovery in _get_discoveries(hass, call):
+            if await discovery.async_remove_device(did):
+                return
+        raise ServiceValidationError(f"bololo device {did} not found")
+
+    async def _async_rediscover(call: ServiceCall) -> None:
+        for discovery in _get_discoveries(hass, call):
+            try:
+                await discovery.async_rediscover()
+            except BololoApiClientError as err:
+                raise HomeAssistantError(f"rediscover bololo devices failed: {err}") from err
+
+    device_schema = vol.Schema({
+        vol.Required(ATTR_DID): cv.string,
+        vol.Optional(ATTR_CONFIG_ENTRY_ID): cv.string,
+    })
+    hass.services.async_register(DOMAIN, SERVICE_ADD_DEVICE, _async_add_device, schema=device_schema)
+    hass.services.async_register(DOMAIN, SERVICE_REMOVE_DEVICE, _async_remove_device, schema=device_schema)
+    hass.services.async_register(
+        DOMAIN, SERVICE_REDISCOVER, _async_rediscover,
+        schema=vol.Schema({vol.Optional(ATTR_CONFIG_ENTRY_ID): cv.string}),
+    )
+
+
+async def async_setup_entry(hass: HomeAssistant, config_entry: BololoConfigEntry):
     """设置配置条目"""
     _LOGGER.debug("call async_setup_entry , config_entry: %s , entry.data : %s", config_entry, config_entry.data)
-    # 创建API客户端和设备管理器
-    bololo_api_client = BololoApiClient(hass, config_entry.data.get(FIELD_NAME_MOBILE))
+    # 每个配置条目复用一个长连接会话，条目卸载或 HA 关闭时关闭
+    session = create_client_session()
 
-    # 创建设备注册表条目
-    device_registry = dr.async_get(hass)
+    async def _async_close_session(_event: Event | None = None) -> None:
+        if not session.closed:
+            await session.close()
 
-    # 存储管理器实例
-    hass.data[DOMAIN]["devices"] = {
-        config_entry.entry_id: []
-    }
+    config_entry.async_on_unload(_async_close_session)
+    config_entry.async_on_unload(
+        hass.bus.async_listen_once(EVENT_HOMEASSISTANT_CLOSE, _async_close_session)
+    )
 
-    device_list = await bololo_api_client.list_device(
-        config_entry.data.get("token").get("userToken")
+    # 同一账号的所有设备共享一个API客户端，连接复用、限流、熔断和统计都按账号生效
+    bololo_api_client = BololoApiClient(
+        config_entry.data.get(FIELD_NAME_APP_KEY),
+        config_entry.data.get(FIELD_NAME_MOBILE),
+        session,
     )
-    platforms = []
-    bololo_devices = []
-    for device_item in device_list:
-        bololo_device_type = get_device_type_by_product_key(device_item["productKey"])
-        if bololo_device_type is None or bololo_device_type.platforms is None:
-            _LOGGER.debug("call async_setup_entry , but device_type : %s for %s", bololo_device_type,
-                          device_item["productKey"])
-            continue
-        platforms.extend(bololo_device_type.platforms)
-        if bololo_device_type == BololoDeviceType.DISINFECTION_CABINET:
-            # 创建设备
-            bololo_device = BololoDisinfectionCabinet(
-                device_info_from_server=device_item,
-                hass=hass,
-                config_entry=config_entry,
-            )
-            device_entry = device_registry.async_get_or_create(
-                config_entry_id=config_entry.entry_id,
-                identifiers={(DOMAIN, device_item.get('did'))},
-                name=device_item.get('name'),
-                manufacturer=device_item.get('manufacturer', 'Bololo'),
-                model=device_item.get('model', bololo_device_type.DISINFECTION_CABINET.name),
-                sw_version=device_item.get('firmware_version', 'UnknownSW'),
-                hw_version=device_item.get('hardware_version', 'UnknownHW'),
-            )
-            bololo_device.device_entry = device_entry
-            bololo_devices.append(bololo_device)
-
-    hass.data[DOMAIN]['devices'][config_entry.entry_id] = bololo_devices
+    # token 过期前后台提前刷新，认证失败的请求等待同一次刷新后重试
+    token_manager = BololoTokenManager(hass, config_entry, bololo_api_client)
+    token_manager.start()
+    config_entry.async_on_unload(token_manager.stop)
+
+    # 本地缓存的设备列表和设备状态
+    device_cache = BololoDeviceCache(hass, config_entry.entry_id)
+    await device_cache.async_load()
+
+    # 每个配置条目一个协调器，统一拉取所有设备状态
+    coordinator = BololoDataUpdateCoordinator(hass, config_entry, device_cache)
+
+    device_list = device_cache.device_list
+    from_cache = device_list is not None
+    if not from_cache:
+        try:
+            device_list = await token_manager.async_call(bololo_api_client.list_device)
+        except BololoApiClientError as err:
+            raise ConfigEntryNotReady(f"request bololo device list failed: {err}") from err
+        device_cache.save_device_list(device_list)
+
+    # 设备集合由设备发现管理，之后的增删都是按 did 的增量操作
+    discovery = BololoDeviceDiscovery(
+        hass, config_entry, device_cache, coordinator, bololo_api_client, token_manager, coordinator.devices
+    )
+    # 运行时对象按配置条目保存，多个账号互不覆盖
+    config_entry.runtime_data = BololoRuntimeData(
+        bololo_api_client, token_manager, device_cache, coordinator, discovery, _get_push_options(config_entry)
+    )
+    bololo_devices = discovery.create_devices(device_list)
+
+    if from_cache:
+        # 实体已显示缓存/重启前的状态，首次刷新在各设备之间随机错开
+        coordinator.set_startup_jitter(STARTUP_REFRESH_JITTER)
+    else:
+        # 首次拉取设备状态，失败时由 HA 稍后重试
+        await coordinator.async_config_entry_first_refresh()
+    # 可选：通过 MQTT 集群接收状态推送
+    if config_entry.options.get(FIELD_NAME_PUSH_MODE, False):
+        _async_start_push(hass, config_entry, coordinator, discovery, bololo_devices)
+    # 选项变更时直接应用到协调器和设备，无需重新加载配置条目
+    config_entry.async_on_unload(config_entry.add_update_listener(async_update_options))
     # 设置平台
-    _LOGGER.debug("call async_setup_entry , entry setup platforms: %s", platforms)
-    await hass.config_entries.async_forward_entry_setups(config_entry, platforms)
+    _LOGGER.debug("call async_setup_entry , entry setup platforms: %s", discovery.platforms)
+    await hass.config_entries.async_forward_entry_setups(config_entry, list(discovery.platforms))
+    if from_cache:
+        # 使用缓存启动，平台设置完成后在后台与云端校准设备列表并拉取最新状态
+        _LOGGER.debug("call async_setup_entry , setup from cached device list")
+        config_entry.async_create_background_task(
+            hass, _async_reconcile_device_list(discovery, coordinator), f"{DOMAIN}_reconcile_device_list"
+        )
+
+    # 低频后台重新发现设备
+    async def _async_rediscover(_now) -> None:
+        try:
+            await discovery.async_rediscover()
+        except BololoApiClientError as err:
+            _LOGGER.warning("call _async_rediscover , rediscover bololo devices failed : %s", err)
+
+    config_entry.async_on_unload(
+        async_track_time_interval(
+            hass, _async_rediscover, timedelta(seconds=REDISCOVERY_INTERVAL), name=f"{DOMAIN}_rediscover"
+        )
+    )
     return True
 
-# pylint: disable=unused-argument
-async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
-    """Unload a config entry."""
-    # 如果需要卸载平台，取消注释下面这行
-    # unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
-    # if unload_ok:
-    #     hass.data[DOMAIN].pop(entry.entry_id)
-    # return unload_ok
 
+async def _async_reconcile_device_list(
+        discovery: BololoDeviceDiscovery,
+        coordinator: BololoDataUpdateCoordinator,
+) -> None:
+    """后台拉取云端设备列表，增量增删有变化的设备，并刷新设备状态"""
+    try:
+        await discovery.async_rediscover()
+    except BololoApiClientError as err:
+        _LOGGER.warning("call _async_reconcile_device_list , request device list failed : %s", err)
+    await coordinator.async_refresh()
+
+
+def _get_push_options(config_entry: ConfigEntry) -> tuple:
+    """推送相关选项"""
+    return (
+        config_entry.options.get(FIELD_NAME_PUSH_MODE, False),
+        config_entry.options.get(FIELD_NAME_MQTT_BROKER) or None,
+    )
+
+
+def _async_start_push(
+        hass: HomeAssistant,
+        config_entry: ConfigEntry,
+        coordinator: BololoDataUpdateCoordinator,
+        discovery: BololoDeviceDiscovery,
+        bololo_devices: list,
+) -> None:
+    """按 MQTT 集群地址为设备建立推送连接"""
+    # pylint: disable=import-outside-toplevel
+    from .mqtt_push import BololoMqttPushClient, add_push_device
+
+    push_clients: dict[tuple[str, int], BololoMqttPushClient] = {}
+    for bololo_device in bololo_devices:
+        add_push_device(hass, config_entry, coordinator, push_clients, bololo_device)
+    # 之后重新发现的设备加入同一组推送连接
+    discovery.set_push_clients(push_clients)
+
+    @callback
+    def _async_update_push_credentials(token: dict) -> None:
+        # MQTT 认证使用 userToken，token 刷新后重连需要使用新的 token
+        for push_client in push_clients.values():
+            push_client.update_credentials(str(token.get("uid")), token.get("userToken"))
+
+    config_entry.async_on_unload(
+        config_entry.runtime_data.token_manager.async_add_token_listener(_async_update_push_credentials)
+    )
+    _LOGGER.debug("call _async_start_push , mqtt brokers : %s", list(push_clients))
+
+
+async def async_update_options(hass: HomeAssistant, config_entry: BololoConfigEntry) -> None:
+    """选项更新"""
+    _LOGGER.debug("call async_update_options , options : %s", config_entry.options)
+    if _get_push_options(config_entry) != config_entry.runtime_data.push_options:
+        # 推送连接需要重建，重新加载配置条目
+        hass.config_entries.async_schedule_reload(config_entry.entry_id)
+        return
+    config_entry.runtime_data.coordinator.apply_options()
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """删除配置条目时清理本地缓存"""
+    await BololoDeviceCache(hass, entry.entry_id).async_remove()
+
+
+async def async_unload_entry(hass: HomeAssistant, entry: BololoConfigEntry) -> bool:
+    """卸载配置条目"""
+    _LOGGER.debug("call async_unload_entry , config_entry: %s", entry)
+    runtime_data = entry.runtime_data
+    unload_ok = await hass.config_entries.async_unload_platforms(entry, runtime_data.discovery.platforms)
+    if not unload_ok:
+        return False
+    # 会话、MQTT 连接、token 定时刷新和后台任务由 async_on_unload 和 HA 在返回后统一清理，
+    # runtime_data 随配置条目卸载一起释放
+    await runtime_data.coordinator.async_shutdown()
+    await runtime_data.discovery.async_shutdown()
     return True
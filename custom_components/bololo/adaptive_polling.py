@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+"""
+自适应轮询
+"""
+from __future__ import annotations
+
+import logging
+from datetime import timedelta
+
+from .const import (
+    ADAPTIVE_POLLING_BACKOFF_FACTOR,
+    ADAPTIVE_POLLING_FAST_INTERVAL,
+    ADAPTIVE_POLLING_MAX_INTERVAL,
+)
+from .disinfection_cabinet_status import BololoDisinfectionCabinetStatus
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class BololoAdaptivePolling:
+    """
+    根据设备工作状态计算下一次轮询间隔：
+    有设备在消毒/烘干时快速轮询，全部空闲时从基础周期开始按指数退避，直到最大周期；
+    工作周期的结束时刻由 predict_cycle_end 预测，协调器据此单独安排一次刷新
+    """
+
+    def __init__(
+            self,
+            base_interval: int,
+            fast_interval: int = ADAPTIVE_POLLING_FAST_INTERVAL,
+            max_interval: int = ADAPTIVE_POLLING_MAX_INTERVAL,
+            backoff_factor: float = ADAPTIVE_POLLING_BACKOFF_FACTOR,
+    ):
+        self._base_interval = base_interval
+        self._fast_interval = fast_interval
+        self._max_interval = max_interval
+        self._backoff_factor = backoff_factor
+        self._idle_rounds = 0
+        self._last_work_states: dict[str, tuple] = {}
+
+    @property
+    def base_interval(self) -> int:
+        """
+        返回空闲时的基础轮询周期（秒）
+        """
+        return self._base_interval
+
+    @base_interval.setter
+    def base_interval(self, base_interval: int):
+        """
+        设置空闲时的基础轮询周期（秒）
+        """
+        self._base_interval = base_interval
+        self.reset()
+
+    def reset(self) -> None:
+        """
+        重置退避，下一次按基础周期轮询
+        """
+        self._idle_rounds = 0
+
+    def next_interval(self, device_status_dict: dict[str, BololoDisinfectionCabinetStatus]) -> timedelta:
+        """
+        根据最新的设备状态计算下一次轮询间隔
+        """
+        work_states = {did: device_status.work_state for did, device_status in device_status_dict.items()}
+        if work_states != self._last_work_states:
+            # 工作状态发生变化，重新从基础周期开始
+            self._idle_rounds = 0
+        self._last_work_states = work_states
+
+        if any(device_status.is_working for device_status in device_status_dict.values()):
+            self._idle_rounds = 0
+            interval = min(self._fast_interval, self._base_interval)
+        else:
+            interval = min(
+                self._base_interval * self._backoff_factor ** self._idle_rounds,
+                max(self._max_interval, self._base_interval),
+            )
+            self._idle_rounds += 1
+        _LOGGER.debug("call next_interval , idle_rounds : %s , interval : %ss", self._idle_rounds, interval)
+        return timedelta(seconds=interval)
+
+    @staticmethod
+    def predict_cycle_end(device_status_dict: dict[str, BololoDisinfectionCabinetStatus]) -> float | None:
+        """
+        根据 work_remain_time 预测最早结束的工作周期还剩多少秒，无设备在工作时返回 None
+        """
+        remain_seconds = [
+            device_status.work_remain_time * 60
+            for device_status in device_status_dict.values()
+            if device_status.is_working and device_status.work_remain_time > 0
+        ]
+        return min(remain_seconds) if remain_seconds else None
@@ -2,27 +2,134 @@
 """
 bololo api 客户端
 """
+import asyncio
 import json
 import logging
+import random
+import time
 from typing import Any
 
 import aiohttp
 import async_timeout
 
+from .circuit_breaker import BololoCircuitBreaker
+from .rate_limiter import BololoTokenBucket
+from .const import (
+    DEFAULT_CONNECTION_LIMIT_PER_HOST,
+    DEFAULT_DNS_CACHE_TTL,
+    DEFAULT_KEEPALIVE_TIMEOUT,
+    DEFAULT_REQUEST_TIMEOUT,
+    DEFAULT_MAX_RETRIES,
+    DEFAULT_RETRY_BACKOFF_BASE,
+    DEFAULT_RETRY_BACKOFF_MAX,
+    DEFAULT_CIRCUIT_FAILURE_THRESHOLD,
+    DEFAULT_CIRCUIT_COOLDOWN,
+    DEFAULT_RATE_LIMIT,
+    DEFAULT_RATE_LIMIT_BURST,
+    DEFAULT_MAX_CONCURRENT_REQUESTS,
+)
+
 _LOGGER = logging.getLogger(__name__)
 
 
+def create_client_session(
+        limit_per_host: int = DEFAULT_CONNECTION_LIMIT_PER_HOST,
+        ttl_dns_cache: int = DEFAULT_DNS_CACHE_TTL,
+        keepalive_timeout: float = DEFAULT_KEEPALIVE_TIMEOUT,
+) -> aiohttp.ClientSession:
+    """
+    创建长连接复用的 aiohttp 会话
+    连接池按 host 限制并发连接数，DNS 解析结果按 ttl 缓存，空闲连接保持 keep-alive
+    """
+    connector = aiohttp.TCPConnector(
+        limit_per_host=limit_per_host,
+        ttl_dns_cache=ttl_dns_cache,
+        keepalive_timeout=keepalive_timeout,
+        enable_cleanup_closed=True,
+    )
+    return aiohttp.ClientSession(connector=connector)
+
+
 class BololoApiClientError(Exception):
     """自定义API异常."""
 
 
+class BololoApiClientCommunicationError(BololoApiClientError):
+    """网络、超时或服务端 5xx 等可重试的异常."""
+
+
+class BololoApiClientCircuitOpenError(BololoApiClientError):
+    """熔断期间请求被直接拒绝."""
+
+
+class BololoApiClientAuthError(BololoApiClientError):
+    """token 无效或已过期."""
+
+
+# 服务端表示认证失败的业务码
+AUTH_ERROR_CODES = ("401", "403")
+
+
 class BololoApiClient:
     """封装Bololo IoT API的客户端."""
 
-    def __init__(self, app_key, mobile):
+    # pylint: disable=too-many-instance-attributes,too-many-arguments,too-many-positional-arguments
+    def __init__(
+            self,
+            app_key,
+            mobile,
+            session: aiohttp.ClientSession,
+            request_timeout: float = DEFAULT_REQUEST_TIMEOUT,
+            max_retries: int = DEFAULT_MAX_RETRIES,
+            retry_backoff_base: float = DEFAULT_RETRY_BACKOFF_BASE,
+            retry_backoff_max: float = DEFAULT_RETRY_BACKOFF_MAX,
+            circuit_failure_threshold: int = DEFAULT_CIRCUIT_FAILURE_THRESHOLD,
+            circuit_cooldown: float = DEFAULT_CIRCUIT_COOLDOWN,
+            rate_limit: float = DEFAULT_RATE_LIMIT,
+            rate_limit_burst: int = DEFAULT_RATE_LIMIT_BURST,
+            max_concurrent_requests: int = DEFAULT_MAX_CONCURRENT_REQUESTS,
+    ):
         self._app_key = app_key
         self._mobile = mobile
         self._host = "https://app.bololoapp3.com"
+        # 会话由创建方传入并负责关闭
+        self._session = session
+        self._request_timeout = request_timeout
+        self._max_retries = max_retries
+        self._retry_backoff_base = retry_backoff_base
+        self._retry_backoff_max = retry_backoff_max
+        # 每个账号一个客户端，熔断器和令牌桶按账号生效，token 刷新后继续沿用
+        self._circuit_breaker = BololoCircuitBreaker(
+            name=str(mobile),
+            failure_threshold=circuit_failure_threshold,
+            cooldown=circuit_cooldown,
+        )
+        # 按账号的令牌桶，以及所有请求共享的并发上限
+        self._rate_limiter = BololoTokenBucket(rate_limit, rate_limit_burst)
+        self._request_semaphore = asyncio.Semaphore(max_concurrent_requests)
+        self._request_count = 0
+        self._queue_wait_total = 0.0
+        self._queue_wait_max = 0.0
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """
+        返回复用的 aiohttp 会话，会话已关闭（配置条目已卸载）时不再发送请求
+        """
+        if self._session.closed:
+            raise BololoApiClientError("aiohttp session is closed")
+        return self._session
+
+    @property
+    def queue_wait_stats(self) -> dict[str, float]:
+        """
+        返回请求在限流和并发上限处排队等待的统计（秒）
+        """
+        return {
+            "request_count": self._request_count,
+            "queue_wait_total": self._queue_wait_total,
+            "queue_wait_avg": self._queue_wait_total / self._request_count if self._request_count else 0.0,
+            "queue_wait_max": self._queue_wait_max,
+        }
 
     async def send_verify_code(self):
         """
@@ -116,6 +223,22 @@ class BololoApiClient:
         }
         return await self._post(path, json_body=json_body, headers={"Content-Type": "application/json"})
 
+    async def refresh_token(self, refresh_token: str) -> dict[str, object]:
+        """
+        使用 refreshToken 换取新的 token
+        成功响应的 data 与 login_by_mobile 相同（userToken、refreshToken、createdAt、expiredAt）
+        """
+        _LOGGER.debug("request bololo refresh token , mobile : %s", self._mobile)
+        path = "/app/user/refreshToken"
+        json_body = {
+            "appKey": self._app_key,
+            "data": {
+                "refreshToken": refresh_token,
+            },
+            "version": "1.0"
+        }
+        return await self._post(path, json_body=json_body, headers={"Content-Type": "application/json"})
+
     async def get_device_status(self, auth_token: str, product_key: str, mac: str):
         """
         获取设备状态
@@ -185,7 +308,7 @@ class BololoApiClient:
             "Authorization": auth_token,
         }
         body_json = {}
-        return await self._post(path, body_json, headers)
+        return await self._post(path, body_json, headers, idempotent=True)
 
     async def list_home(self, auth_token: str):
         """
@@ -236,7 +359,7 @@ class BololoApiClient:
         headers = {
             "Authorization": auth_token
         }
-        return await self._get(path, headers)
+        return await self._get(path, headers, idempotent=True)
 
     async def list_device(self, auth_token: str):
         """
@@ -287,52 +410,93 @@ class BololoApiClient:
         headers = {
             "Authorization": auth_token,
         }
-        return await self._get(path, headers)
+        return await self._get(path, headers, idempotent=True)
 
-    async def _post(self, path, json_body, headers):
-        url = f"{self._host}{path}"
-        _session = aiohttp.ClientSession()
-        try:
-            async with async_timeout.timeout(10):
-                async with _session.post(url, json=json_body, headers=headers, ssl=False) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        _LOGGER.debug("call %s POST request response : %s", path, data)
-                        data_code = data.get("code")
-                        if data_code == "200":
-                            _LOGGER.debug("call %s POST request success: %s", path, data_code)
-                            return data.get("data")
-                        raise BololoApiClientError(
-                            f"call {path} POST request HTTP response not expected: {data}"
-                        )
-                    error_text = await response.text()
-                    _LOGGER.error("call %s POST request failed: %s - %s", path, response.status, error_text)
-                    raise BololoApiClientError(
-                        f"call {path} POST request HTTP {response.status}: {error_text}"
-                    )
-        finally:
-            await _session.close()
+    async def _post(self, path, json_body, headers, idempotent: bool = False):
+        return await self._request("POST", path, headers, json_body=json_body, idempotent=idempotent)
+
+    async def _get(self, path, headers, idempotent: bool = False):
+        return await self._request("GET", path, headers, idempotent=idempotent)
+
+    def _record_queue_wait(self, path: str, queue_wait: float) -> None:
+        self._request_count += 1
+        self._queue_wait_total += queue_wait
+        self._queue_wait_max = max(self._queue_wait_max, queue_wait)
+        if queue_wait > 0.01:
+            _LOGGER.debug("call %s request queued %.3fs for rate limit / concurrency", path, queue_wait)
 
-    async def _get(self, path, headers):
+    # pylint: disable=too-many-arguments,too-many-positional-arguments
+    async def _request(self, method: str, path: str, headers, json_body=None, idempotent: bool = False):
+        """
+        发送请求，幂等请求在网络异常时按指数退避加随机抖动重试，连续失败后按账号熔断
+        """
+        circuit_breaker = self._circuit_breaker
+        attempts = self._max_retries + 1 if idempotent else 1
+        for attempt in range(attempts):
+            if not circuit_breaker.allow_request():
+                raise BololoApiClientCircuitOpenError(
+                    f"call {path} {method} request rejected , circuit open for {circuit_breaker.remaining_cooldown:.0f}s"
+                )
+            try:
+                data = await self._request_once(method, path, headers, json_body)
+            except BololoApiClientCommunicationError as err:
+                circuit_breaker.record_failure()
+                if attempt + 1 >= attempts or circuit_breaker.is_open:
+                    raise
+                delay = random.uniform(0, min(self._retry_backoff_max, self._retry_backoff_base * 2 ** attempt))
+                _LOGGER.debug("call %s %s request failed , retry in %.2fs : %s", path, method, delay, err)
+                await asyncio.sleep(delay)
+                continue
+            except BololoApiClientError:
+                # 服务端有响应，链路正常
+                circuit_breaker.record_success()
+                raise
+            circuit_breaker.record_success()
+            return data
+        return None
+
+    async def _request_once(self, method: str, path: str, headers, json_body=None):
+        queue_started_at = time.monotonic()
+        await self._rate_limiter.async_acquire()
+        async with self._request_semaphore:
+            self._record_queue_wait(path, time.monotonic() - queue_started_at)
+            return await self._send_request(method, path, headers, json_body)
+
+    async def _send_request(self, method: str, path: str, headers, json_body=None):
         url = f"{self._host}{path}"
-        _session = aiohttp.ClientSession()
         try:
-            async with async_timeout.timeout(10):  # 设置超时
-                async with _session.get(url, headers=headers, ssl=False) as response:
+            async with async_timeout.timeout(self._request_timeout):  # 设置超时
+                async with self._get_session().request(
+                        method, url, json=json_body, headers=headers, ssl=False
+                ) as response:
                     if response.status == 200:
                         data = await response.json()
-                        _LOGGER.debug("call %s GET request response : %s", path, data)
+                        _LOGGER.debug("call %s %s request response : %s", path, method, data)
                         data_code = data.get("code")
                         if data_code == "200":
-                            _LOGGER.debug("call %s GET request success: %s", path, data_code)
+                            _LOGGER.debug("call %s %s request success: %s", path, method, data_code)
                             return data.get("data")
+                        if data_code in AUTH_ERROR_CODES:
+                            raise BololoApiClientAuthError(
+                                f"call {path} {method} request unauthorized: {data}"
+                            )
                         raise BololoApiClientError(
-                            f"call {path} GET request HTTP response not excepted : {data}"
+                            f"call {path} {method} request HTTP response not expected: {data}"
                         )
                     error_text = await response.text()
-                    _LOGGER.error("call %s GET request failed: %s - %s", path, response.status, error_text)
+                    _LOGGER.error("call %s %s request failed: %s - %s", path, method, response.status, error_text)
+                    if response.status in (401, 403):
+                        raise BololoApiClientAuthError(
+                            f"call {path} {method} request HTTP {response.status}: {error_text}"
+                        )
+                    if response.status >= 500 or response.status == 429:
+                        raise BololoApiClientCommunicationError(
+                            f"call {path} {method} request HTTP {response.status}: {error_text}"
+                        )
                     raise BololoApiClientError(
-                        f"call {path} GET request HTTP {response.status}: {error_text}"
+                        f"call {path} {method} request HTTP {response.status}: {error_text}"
                     )
-        finally:
-            await _session.close()
+        except TimeoutError as err:
+            raise BololoApiClientCommunicationError(f"call {path} {method} request timeout") from err
+        except aiohttp.ClientError as err:
+            raise BololoApiClientCommunicationError(f"call {path} {method} request failed: {err}") from err
@@ -2,40 +2,121 @@
 """
 bololo api 客户端
 """
+from __future__ import annotations
+
 import logging
+from typing import TYPE_CHECKING, Any
 
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.helpers.entity import Entity
-from homeassistant.helpers.translation import async_get_translations
+from homeassistant.core import State, callback
+from homeassistant.helpers.event import async_call_later
+from homeassistant.helpers.restore_state import RestoreEntity
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
 from custom_components.bololo import DOMAIN
 from custom_components.bololo.disinfection_cabinet_function import BololoDisinfectionCabinetFunction
 
 _LOGGER = logging.getLogger(__name__)
 
+if TYPE_CHECKING:
+    from custom_components.bololo.coordinator import BololoDataUpdateCoordinator
+    from custom_components.bololo.disinfection_cabinet import BololoDisinfectionCabinet
+
+
+class BololoEntity(CoordinatorEntity, RestoreEntity):
+    """
+    bololo 实体基类，状态由协调器统一拉取，设备对比差异后只推送给字段发生变化的实体，不再单独轮询
+    设备还没有状态时，使用 HA 重启前的最后状态，并标记为 stale，超过最大陈旧时长仍未获取到状态时变为不可用
+    实体名称由设备名称和翻译后的功能名称组成，entity_id 按设备 mac 区分，同一账号下多台设备互不冲突
+    """
 
-class BololoEntity(Entity):
+    _attr_has_entity_name = True
 
     def __init__(
             self,
             config_entry: ConfigEntry,
+            coordinator: BololoDataUpdateCoordinator,
             bololo_disinfection_cabinet_function: BololoDisinfectionCabinetFunction,
     ) -> None:
-        Entity.__init__(self)
+        CoordinatorEntity.__init__(self, coordinator)
+        self._disinfection_cabinet = None
         self._config_entry = config_entry
         self._bololo_disinfection_cabinet_function = bololo_disinfection_cabinet_function
+        self._attr_translation_key = bololo_disinfection_cabinet_function.function
+        self._restored = False
+
+    def set_disinfection_cabinet(self, disinfection_cabinet: BololoDisinfectionCabinet):
+        """
+        设置 消毒柜对象引用
+        """
+        self._disinfection_cabinet = disinfection_cabinet
+        function_on_server = self._bololo_disinfection_cabinet_function.function_on_server
+        # pylint: disable=attribute-defined-outside-init
+        self._attr_unique_id = f"{disinfection_cabinet.mac.lower()}_{function_on_server}"
+        self.entity_id = (f"{self._bololo_disinfection_cabinet_function.platform.lower()}."
+                          f"{DOMAIN}_{disinfection_cabinet.mac.lower()}_{function_on_server}")
+
+    @property
+    def available(self) -> bool:
+        """设备状态未超过最大陈旧时长时可用，与单次拉取是否成功无关"""
+        if self._disinfection_cabinet is None:
+            return False
+        return self._disinfection_cabinet.available or self._restored
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any] | None:
+        """状态来自重启前的缓存，尚未从云端确认时标记为 stale"""
+        if self._restored or (
+                self._disinfection_cabinet is not None and self._disinfection_cabinet.device_status_restored):
+            return {"stale": True}
+        return None
+
+    def _update_from_device_status(self) -> None:
+        """
+        根据设备最近一次状态更新实体属性，子类实现
+        """
+
+    def _restore_from_last_state(self, last_state: State) -> None:
+        """
+        使用重启前的最后状态初始化实体属性，子类实现
+        """
+
+    @property
+    def status_fields(self) -> tuple[str, ...]:
+        """
+        实体关注的设备状态字段，这些字段变化时实体才会更新
+        """
+        return (self._bololo_disinfection_cabinet_function.function_on_server,)
+
+    @callback
+    def handle_device_status_update(self) -> None:
+        """设备状态中实体关注的字段、可用性或 stale 标记发生变化时由设备调用"""
+        if self._disinfection_cabinet.last_device_status is not None:
+            self._restored = False
+        self._update_from_device_status()
+        self.async_write_ha_state()
 
     async def async_added_to_hass(self):
         """当实体添加到HA时调用"""
-        translations = await async_get_translations(
-            hass=self.hass,
-            language=self.hass.config.language,
-            category="entity",
-            integrations=[DOMAIN]
-        )
-        _LOGGER.debug("call async_added_to_hass , translations : %s", translations)
-        # 使用翻译后的名称
-        self._attr_name = translations.get(
-            f"component.{self.platform.config_entry.domain}.entity.{self._bololo_disinfection_cabinet_function.platform.lower()}.{self._bololo_disinfection_cabinet_function.function}.name",
-            self._attr_name  # 默认名称
-        )
+        # 不直接监听协调器，由设备对比状态差异后只通知相关实体
+        await RestoreEntity.async_added_to_hass(self)
+        self.async_on_remove(self._disinfection_cabinet.async_add_entity_listener(self))
+        if self._disinfection_cabinet.last_device_status is None:
+            last_state = await self.async_get_last_state()
+            if last_state is not None:
+                _LOGGER.debug("call async_added_to_hass , restore last state : %s", last_state.state)
+                self._restore_from_last_state(last_state)
+                self._restored = True
+                self.async_on_remove(
+                    async_call_later(self.hass, self.coordinator.status_max_staleness, self._async_expire_restored)
+                )
+        self._update_from_device_status()
+
+    @callback
+    def _async_expire_restored(self, _now) -> None:
+        """重启前的状态超过最大陈旧时长仍未被设备状态取代，不再视为可用"""
+        if not self._restored:
+            return
+        _LOGGER.debug("call _async_expire_restored , restored state of %s expired", self.entity_id)
+        self._restored = False
+        self.async_write_ha_state()
@@ -3,25 +3,26 @@
 开关设备设置
 """
 import logging
-from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import Platform
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers.entity_platform import AddEntitiesCallback, EntityPlatform
 
-from .const import DOMAIN
 from .device import  BololoDevice
+from .runtime_data import BololoConfigEntry
 from .disinfection_cabinet_button import DisinfectionCabinetButton
 
 _LOGGER = logging.getLogger(__name__)
 
 
+# pylint: disable=unused-argument
 async def async_setup_entry(
         hass: HomeAssistant,
-        config_entry: ConfigEntry,
+        config_entry: BololoConfigEntry,
         async_add_entities: AddEntitiesCallback,
 ) -> None:
     """设置 config entry."""
     _LOGGER.debug("call button async_setup_entry , config_entry: %s", config_entry)
-    bololo_devices: list[BololoDevice] = hass.data[DOMAIN]['devices'][config_entry.entry_id]
+    bololo_devices: list[BololoDevice] = config_entry.runtime_data.devices
     _LOGGER.debug("call button async_setup_entry , bololo_devices: %s", bololo_devices)
 
     new_entities = []
@@ -33,3 +34,7 @@ async def async_setup_entry(
 
     if new_entities:
         async_add_entities(new_entities)
+    # 之后重新发现的设备通过该回调增量添加实体
+    config_entry.runtime_data.discovery.register_platform(
+        Platform.BUTTON, DisinfectionCabinetButton, async_add_entities
+    )
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""
+熔断器
+"""
+from __future__ import annotations
+
+import logging
+import time
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class BololoCircuitBreaker:
+    """
+    连续失败达到阈值后熔断，冷却期内直接拒绝请求；
+    冷却期结束后放行一次试探请求（半开），成功则恢复，失败则重新熔断
+    """
+
+    def __init__(self, name: str, failure_threshold: int, cooldown: float):
+        self._name = name
+        self._failure_threshold = failure_threshold
+        self._cooldown = cooldown
+        self._failure_count = 0
+        self._opened_at: float | None = None
+        self._probe_started_at: float | None = None
+
+    @property
+    def is_open(self) -> bool:
+        """
+        是否处于熔断状态
+        """
+        return self._opened_at is not None
+
+    @property
+    def remaining_cooldown(self) -> float:
+        """
+        距离冷却结束的秒数
+        """
+        if self._opened_at is None:
+            return 0
+        return max(0.0, self._opened_at + self._cooldown - time.monotonic())
+
+    def allow_request(self) -> bool:
+        """
+        是否放行本次请求
+        """
+        if self._opened_at is None:
+            return True
+        if self.remaining_cooldown > 0:
+            return False
+        now = time.monotonic()
+        if self._probe_started_at is not None and now - self._probe_started_at < self._cooldown:
+            # 已有试探请求在进行中
+            return False
+        # 冷却结束，放行一次试探请求
+        self._probe_started_at = now
+        return True
+
+    def record_success(self) -> None:
+        """
+        记录一次成功
+        """
+        if self._opened_at is not None:
+            _LOGGER.info("circuit breaker %s closed", self._name)
+        self._failure_count = 0
+        self._opened_at = None
+        self._probe_started_at = None
+
+    def record_failure(self) -> None:
+        """
+        记录一次失败
+        """
+        self._failure_count += 1
+        if self._probe_started_at is not None or (
+                self._opened_at is None and self._failure_count >= self._failure_threshold):
+            _LOGGER.warning("circuit breaker %s opened for %ss after %s failure(s)",
+                            self._name, self._cooldown, self._failure_count)
+            self._opened_at = time.monotonic()
+            self._probe_started_at = None
@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""
+设备控制命令合并
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, callback
+
+from .const import DOMAIN, COMMAND_COALESCE_WINDOW
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class BololoCommandBuffer:
+    # pylint: disable=too-many-instance-attributes
+    """
+    单台设备的控制命令队列：
+    短时间窗口内到达的写入合并为一个 command_data（同一字段后写覆盖先写），只发送一次 control_device，
+    每个调用方在合并后的请求完成时返回（失败时抛出同一个异常）
+    同一设备同一时刻最多一个请求在发送，请求按写入顺序依次完成，最终状态与最后一次写入一致；不同设备互不阻塞
+    """
+
+    def __init__(
+            self,
+            hass: HomeAssistant,
+            config_entry: ConfigEntry,
+            send: Callable[[dict[str, Any]], Awaitable[None]],
+            window: float = COMMAND_COALESCE_WINDOW,
+    ):
+        self._hass = hass
+        self._config_entry = config_entry
+        self._send = send
+        self._window = window
+        self._pending_command_data: dict[str, Any] = {}
+        self._pending_waiters: list[asyncio.Future] = []
+        self._flush_handle: asyncio.TimerHandle | None = None
+        self._send_task: asyncio.Task | None = None
+
+    async def async_write(self, command_data: dict[str, Any]) -> None:
+        """
+        写入命令，等待包含它的请求完成
+        """
+        self._pending_command_data.update(command_data)
+        waiter = self._hass.loop.create_future()
+        self._pending_waiters.append(waiter)
+        if self._flush_handle is None and self._send_task is None:
+            self._flush_handle = self._hass.loop.call_later(self._window, self._flush)
+        await waiter
+
+    @callback
+    def _flush(self) -> None:
+        """
+        窗口结束，开始按顺序发送已合并的命令
+        """
+        self._flush_handle = None
+        if self._send_task is not None or not self._pending_waiters:
+            return
+        self._send_task = self._config_entry.async_create_background_task(
+            self._hass,
+            self._async_send_batches(),
+            f"{DOMAIN}_command_flush",
+        )
+
+    async def _async_send_batches(self) -> None:
+        """
+        同一时刻只有一个请求在发送；发送期间到达的写入合并为下一批，上一批完成后立即发送
+        """
+        try:
+            while self._pending_waiters:
+                command_data, waiters = self._pending_command_data, self._pending_waiters
+                self._pending_command_data, self._pending_waiters = {}, []
+                if not command_data:
+                    for waiter in waiters:
+                        if not waiter.done():
+                            waiter.set_result(None)
+                    continue
+                _LOGGER.debug("call _async_send_batches , send %s merged command(s) : %s", len(waiters), command_data)
+                await self._async_send(command_data, waiters)
+        finally:
+            if self._send_task is asyncio.current_task():
+                self._send_task = None
+
+    async def _async_send(self, command_data: dict[str, Any], waiters: list[asyncio.Future]) -> None:
+        try:
+            await self._send(command_data)
+        except asyncio.CancelledError:
+            for waiter in waiters:
+                waiter.cancel()
+            raise
+        except Exception as err:  # pylint: disable=broad-exception-caught
+            for waiter in waiters:
+                if not waiter.done():
+                    waiter.set_exception(err)
+            return
+        for waiter in waiters:
+            if not waiter.done():
+                waiter.set_result(None)
+
+    @callback
+    def cancel(self) -> None:
+        """
+        取消尚未发送和正在发送的命令
+        """
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if self._send_task is not None and not self._send_task.done():
+            self._send_task.cancel()
+        self._send_task = None
+        for waiter in self._pending_waiters:
+            if not waiter.done():
+                waiter.cancel()
+        self._pending_command_data, self._pending_waiters = {}, []
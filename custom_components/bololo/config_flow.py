@@ -9,13 +9,26 @@ import voluptuous as vol
 from homeassistant import config_entries
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import callback
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
 
 from .api_client import BololoApiClient
 from .const import (
     DOMAIN,
     FIELD_NAME_MOBILE,
     FIELD_NAME_APP_KEY,
-    FIELD_NAME_VERIFY_CODE, FIELD_NAME_TOKEN
+    FIELD_NAME_VERIFY_CODE, FIELD_NAME_TOKEN,
+    FIELD_NAME_SCAN_INTERVAL,
+    FIELD_NAME_STATUS_MAX_STALENESS,
+    FIELD_NAME_REFRESH_CONCURRENCY,
+    FIELD_NAME_SKIP_REDUNDANT_COMMANDS,
+    FIELD_NAME_MIN_TRUSTED_STATUS_AGE,
+    FIELD_NAME_PUSH_MODE,
+    FIELD_NAME_MQTT_BROKER,
+    DEFAULT_SCAN_INTERVAL,
+    DEFAULT_STATUS_MAX_STALENESS,
+    DEFAULT_REFRESH_CONCURRENCY,
+    DEFAULT_SKIP_REDUNDANT_COMMANDS,
+    DEFAULT_MIN_TRUSTED_STATUS_AGE,
 )
 
 _LOGGER = logging.getLogger(__name__)
@@ -48,6 +61,7 @@ class BololoConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                 api = BololoApiClient(
                     user_input.get(FIELD_NAME_APP_KEY),
                     user_input.get(FIELD_NAME_MOBILE),
+                    async_get_clientsession(self.hass, verify_ssl=False),
                 )
                 await api.send_verify_code()
                 self.mobile = user_input.get(FIELD_NAME_MOBILE)
@@ -92,6 +106,7 @@ class BololoConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                 api = BololoApiClient(
                     self.app_key,
                     self.mobile,
+                    async_get_clientsession(self.hass, verify_ssl=False),
                 )
                 token = await api.login_by_mobile(verify_code)
                 _LOGGER.debug("verify code %s, token: %s", verify_code, token)
@@ -159,9 +174,34 @@ class BololoOptionsFlowHandler(config_entries.OptionsFlow):
             data_schema=vol.Schema(
                 {
                     vol.Optional(
-                        "scan_interval",
-                        default=current_options.get("scan_interval", 60)
-                    ): int,
+                        FIELD_NAME_SCAN_INTERVAL,
+                        default=current_options.get(FIELD_NAME_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL)
+                    ): vol.All(int, vol.Range(min=1)),
+                    vol.Optional(
+                        FIELD_NAME_STATUS_MAX_STALENESS,
+                        default=current_options.get(FIELD_NAME_STATUS_MAX_STALENESS, DEFAULT_STATUS_MAX_STALENESS)
+                    ): vol.All(int, vol.Range(min=1)),
+                    vol.Optional(
+                        FIELD_NAME_REFRESH_CONCURRENCY,
+                        default=current_options.get(FIELD_NAME_REFRESH_CONCURRENCY, DEFAULT_REFRESH_CONCURRENCY)
+                    ): vol.All(int, vol.Range(min=1)),
+                    vol.Optional(
+                        FIELD_NAME_SKIP_REDUNDANT_COMMANDS,
+                        default=current_options.get(FIELD_NAME_SKIP_REDUNDANT_COMMANDS,
+                                                    DEFAULT_SKIP_REDUNDANT_COMMANDS)
+                    ): bool,
+                    vol.Optional(
+                        FIELD_NAME_MIN_TRUSTED_STATUS_AGE,
+                        default=current_options.get(FIELD_NAME_MIN_TRUSTED_STATUS_AGE, DEFAULT_MIN_TRUSTED_STATUS_AGE)
+                    ): vol.All(int, vol.Range(min=0)),
+                    vol.Optional(
+                        FIELD_NAME_PUSH_MODE,
+                        default=current_options.get(FIELD_NAME_PUSH_MODE, False)
+                    ): bool,
+                    vol.Optional(
+                        FIELD_NAME_MQTT_BROKER,
+                        description={"suggested_value": current_options.get(FIELD_NAME_MQTT_BROKER)}
+                    ): str,
                     # vol.Optional("update_device_list", default=False): bool,  # 伪装成按钮
                     # vol.Optional('home_list'): cv.multi_select(home_dict),
                     # vol.Optional('device_list'): cv.multi_select(device_dict),
@@ -10,7 +10,73 @@ FIELD_NAME_MOBILE = "mobile"
 FIELD_NAME_VERIFY_CODE = "verify_code"
 FIELD_NAME_SCAN_INTERVAL = "scan_interval"
 FIELD_NAME_TOKEN = "token"
+FIELD_NAME_STATUS_MAX_STALENESS = "status_max_staleness"
+FIELD_NAME_REFRESH_CONCURRENCY = "refresh_concurrency"
+FIELD_NAME_PUSH_MODE = "push_mode"
+FIELD_NAME_SKIP_REDUNDANT_COMMANDS = "skip_redundant_commands"
+FIELD_NAME_MIN_TRUSTED_STATUS_AGE = "min_trusted_status_age"
+FIELD_NAME_MQTT_BROKER = "mqtt_broker"
+
+DEFAULT_SCAN_INTERVAL = 60
+# 设备状态超过该时长（秒）仍未刷新成功时，实体变为不可用
+DEFAULT_STATUS_MAX_STALENESS = 600
+# 批量刷新设备状态时同时进行的请求数
+DEFAULT_REFRESH_CONCURRENCY = 4
+DEFAULT_SKIP_REDUNDANT_COMMANDS = True
+# 判断控制命令是否多余时，不超过该时长（秒）的状态快照总是可信，轮询周期更长时以轮询周期为准
+DEFAULT_MIN_TRUSTED_STATUS_AGE = 10
+
+# 自适应轮询：工作中快速轮询，空闲时指数退避
+ADAPTIVE_POLLING_FAST_INTERVAL = 15
+ADAPTIVE_POLLING_MAX_INTERVAL = 600
+ADAPTIVE_POLLING_BACKOFF_FACTOR = 2
+# 在预测的工作周期结束时刻单独刷新一次，多等待的秒数，避免设备尚未上报结束状态
+CYCLE_END_REFRESH_DELAY = 5
 
 SERVICE_ADD_DEVICE = "add_device"
 SERVICE_REMOVE_DEVICE = "remove_device"
 SERVICE_REDISCOVER = "rediscover"
+ATTR_DID = "did"
+ATTR_CONFIG_ENTRY_ID = "config_entry_id"
+# 后台重新发现设备的间隔（秒），只增删有变化的设备
+REDISCOVERY_INTERVAL = 60 * 60
+
+# 与 Bololo 云端的 HTTP 连接池配置
+DEFAULT_CONNECTION_LIMIT_PER_HOST = 4
+DEFAULT_DNS_CACHE_TTL = 300
+DEFAULT_KEEPALIVE_TIMEOUT = 60
+
+# 请求超时、幂等请求重试（指数退避 + 随机抖动）与按账号熔断
+DEFAULT_REQUEST_TIMEOUT = 10
+DEFAULT_MAX_RETRIES = 2
+DEFAULT_RETRY_BACKOFF_BASE = 0.5
+DEFAULT_RETRY_BACKOFF_MAX = 5
+DEFAULT_CIRCUIT_FAILURE_THRESHOLD = 5
+DEFAULT_CIRCUIT_COOLDOWN = 60
+
+# 按账号的令牌桶限流（请求/秒、突发上限）与同时进行中的请求数上限
+DEFAULT_RATE_LIMIT = 5
+DEFAULT_RATE_LIMIT_BURST = 10
+DEFAULT_MAX_CONCURRENT_REQUESTS = 4
+
+# 本地缓存写盘的合并延迟（秒）
+DEVICE_CACHE_SAVE_DELAY = 30
+# 使用缓存启动后，首次刷新在各设备之间随机错开的最大秒数
+STARTUP_REFRESH_JITTER = 30
+
+# 在 token 过期前提前刷新的秒数，刷新失败后的重试间隔
+TOKEN_REFRESH_MARGIN = 24 * 60 * 60
+TOKEN_REFRESH_RETRY_INTERVAL = 10 * 60
+
+# 同一设备在该窗口（秒）内的控制命令合并为一次请求
+COMMAND_COALESCE_WINDOW = 0.1
+# 控制命令发出后的确认轮询间隔（秒），全部轮询后仍未确认的字段回滚为设备上报的值
+CONTROL_CONFIRM_POLL_DELAYS = (1, 2, 4, 8)
+# 选择框连续切换时的防抖时间（秒），只发送最后一次选择
+SELECT_DEBOUNCE_COOLDOWN = 1.0
+
+# MQTT 推送：设备状态主题，推送连接正常的设备 REST 仅以较低频率校准，
+# 校准周期不超过最大陈旧时长的一半，长时间没有推送的空闲设备不会变为不可用
+MQTT_STATUS_TOPIC_TEMPLATE = "dev2app/{did}"
+MQTT_KEEPALIVE = 60
+PUSH_RECONCILE_INTERVAL = 300
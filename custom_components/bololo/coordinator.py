@@ -0,0 +1,298 @@
+# -*- coding: utf-8 -*-
+"""
+设备状态协调器
+"""
+from __future__ import annotations
+
+import logging
+from datetime import timedelta
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+
+from .adaptive_polling import BololoAdaptivePolling
+from .const import (
+    DOMAIN,
+    DEFAULT_SCAN_INTERVAL,
+    DEFAULT_STATUS_MAX_STALENESS,
+    DEFAULT_REFRESH_CONCURRENCY,
+    DEFAULT_SKIP_REDUNDANT_COMMANDS,
+    DEFAULT_MIN_TRUSTED_STATUS_AGE,
+    CYCLE_END_REFRESH_DELAY,
+    FIELD_NAME_SCAN_INTERVAL,
+    FIELD_NAME_STATUS_MAX_STALENESS,
+    FIELD_NAME_REFRESH_CONCURRENCY,
+    FIELD_NAME_SKIP_REDUNDANT_COMMANDS,
+    FIELD_NAME_MIN_TRUSTED_STATUS_AGE,
+    PUSH_RECONCILE_INTERVAL,
+)
+from .device import BololoDevice
+from .device_cache import BololoDeviceCache
+from .fleet_refresh import BololoFleetRefreshResult, async_refresh_fleet_status
+from .disinfection_cabinet_status import BololoDisinfectionCabinetStatus
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class BololoDataUpdateCoordinator(DataUpdateCoordinator[dict[str, BololoDisinfectionCabinetStatus]]):
+    # pylint: disable=too-many-instance-attributes
+    """
+    每个配置条目一个协调器，每个周期为每台设备拉取一次状态，再分发给该设备的所有实体
+    """
+
+    def __init__(self, hass: HomeAssistant, config_entry: ConfigEntry, device_cache: BololoDeviceCache):
+        scan_interval = config_entry.options.get(FIELD_NAME_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL)
+        DataUpdateCoordinator.__init__(
+            self,
+            hass,
+            _LOGGER,
+            config_entry=config_entry,
+            name=f"{DOMAIN}_{config_entry.entry_id}",
+            update_interval=timedelta(seconds=scan_interval),
+        )
+        self._adaptive_polling = BololoAdaptivePolling(scan_interval)
+        self._device_cache = device_cache
+        # 设备列表由设备发现原地增删
+        self._devices: list[BololoDevice] = []
+        self._last_fleet_refresh_result: BololoFleetRefreshResult | None = None
+        self._startup_jitter = 0.0
+        self._cancel_cycle_end_refresh: CALLBACK_TYPE | None = None
+
+    @property
+    def status_max_staleness(self) -> int:
+        """
+        返回设备状态最大陈旧时长（秒）
+        """
+        return self.config_entry.options.get(FIELD_NAME_STATUS_MAX_STALENESS, DEFAULT_STATUS_MAX_STALENESS)
+
+    @property
+    def push_reconcile_interval(self) -> int:
+        """
+        返回推送覆盖的设备的 REST 校准周期（秒），不超过最大陈旧时长的一半
+        """
+        return max(1, min(PUSH_RECONCILE_INTERVAL, self.status_max_staleness // 2))
+
+    @property
+    def refresh_concurrency(self) -> int:
+        """
+        返回批量刷新设备状态时的并发上限
+        """
+        return self.config_entry.options.get(FIELD_NAME_REFRESH_CONCURRENCY, DEFAULT_REFRESH_CONCURRENCY)
+
+    @property
+    def skip_redundant_commands(self) -> bool:
+        """
+        是否跳过与当前状态相同的控制命令
+        """
+        return self.config_entry.options.get(FIELD_NAME_SKIP_REDUNDANT_COMMANDS, DEFAULT_SKIP_REDUNDANT_COMMANDS)
+
+    @property
+    def min_trusted_status_age(self) -> int:
+        """
+        判断控制命令是否多余时状态快照的最短可信时长（秒），轮询周期更长时以轮询周期为准
+        """
+        return self.config_entry.options.get(FIELD_NAME_MIN_TRUSTED_STATUS_AGE, DEFAULT_MIN_TRUSTED_STATUS_AGE)
+
+    @property
+    def skipped_command_count(self) -> int:
+        """
+        所有设备因状态已一致而省去的控制请求数
+        """
+        return sum(getattr(bololo_device, "skipped_command_count", 0) for bololo_device in self._devices)
+
+    def trusted_status_age(self, bololo_device: BololoDevice) -> float:
+        """
+        返回判断控制命令是否多余时可信任的状态快照时长（秒）：
+        协调器在下一次轮询前不会刷新状态，不超过当前轮询周期（推送覆盖的设备为校准周期）的快照即为最新，
+        不短于 min_trusted_status_age，且不超过最大陈旧时长
+        """
+        if bololo_device.push_connected:
+            interval = self.push_reconcile_interval
+        elif self.update_interval is not None:
+            interval = self.update_interval.total_seconds()
+        else:
+            interval = self._adaptive_polling.base_interval
+        return min(max(interval, self.min_trusted_status_age), self.status_max_staleness)
+
+    @property
+    def last_fleet_refresh_result(self) -> BololoFleetRefreshResult | None:
+        """
+        返回最近一次批量刷新的结果（失败设备、每台设备耗时）
+        """
+        return self._last_fleet_refresh_result
+
+    def set_startup_jitter(self, startup_jitter: float) -> None:
+        """
+        下一次刷新时各设备随机错开的最大秒数，只生效一次
+        """
+        self._startup_jitter = startup_jitter
+
+    def apply_options(self) -> None:
+        """
+        应用配置条目的选项（轮询周期、最大陈旧时长等），不重建设备和实体
+        """
+        scan_interval = self.config_entry.options.get(FIELD_NAME_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL)
+        _LOGGER.debug("call apply_options , scan_interval : %s , status_max_staleness : %s",
+                      scan_interval, self.status_max_staleness)
+        for bololo_device in self.devices:
+            bololo_device.status_max_staleness = self.status_max_staleness
+        self._adaptive_polling.base_interval = scan_interval
+        self.update_interval = self._next_update_interval(self.data or {})  # pylint: disable=attribute-defined-outside-init
+        # 按新的周期重新安排下一次拉取
+        self._schedule_refresh()
+
+    @callback
+    def async_update_push_coverage(self) -> None:
+        """
+        设备的推送连接状态变化：只有推送覆盖的设备降为低频校准，失去推送的设备恢复自适应轮询
+        """
+        _LOGGER.debug("call async_update_push_coverage , push connected devices : %s",
+                      [bololo_device.did for bololo_device in self.devices if bololo_device.push_connected])
+        self._adaptive_polling.reset()
+        self.update_interval = self._next_update_interval(self.data or {})  # pylint: disable=attribute-defined-outside-init
+        self._schedule_refresh()
+
+    @callback
+    def async_set_device_status(self, bololo_device: BololoDevice) -> None:
+        """
+        单台设备上报了新状态（推送或确认轮询），保存后分发给实体
+        """
+        self._save_device_status(bololo_device)
+        self.async_publish_device_status(bololo_device)
+
+    @callback
+    def async_publish_device_status(self, bololo_device: BololoDevice) -> None:
+        """
+        把设备当前的状态快照（可能含尚未确认的控制字段）分发给实体，不写入本地缓存
+        不使用 async_set_updated_data，它会重新开始计时，频繁推送的设备会让其他设备的轮询一直推迟
+        """
+        self.data = {**(self.data or {}), bololo_device.did: bololo_device.last_device_status}  # pylint: disable=attribute-defined-outside-init
+        self.async_update_listeners()
+
+    def _save_device_status(self, bololo_device: BololoDevice) -> None:
+        """
+        只缓存设备确认的状态及其拉取时间，重启后恢复的状态不含乐观应用的控制字段，过期判断照常生效
+        """
+        confirmed_device_status = bololo_device.confirmed_device_status
+        if confirmed_device_status is None or bololo_device.device_status_restored:
+            return
+        self._device_cache.save_device_status(
+            bololo_device.did, confirmed_device_status.status_info, bololo_device.device_status_timestamp_ms
+        )
+
+    @callback
+    def remove_device_status(self, did: str) -> None:
+        """
+        设备被移除后丢弃它的状态
+        """
+        if self.data is not None:
+            self.data.pop(did, None)
+
+    def notify_device_activity(self) -> None:
+        """
+        设备被控制后调用：重置空闲退避，控制结果由设备自己的确认轮询拉取，不再刷新所有设备
+        """
+        self._adaptive_polling.reset()
+
+    @property
+    def devices(self) -> list[BololoDevice]:
+        """
+        返回当前配置条目下的设备
+        """
+        return self._devices
+
+    def _next_update_interval(self, device_status_dict: dict[str, BololoDisinfectionCabinetStatus]) -> timedelta:
+        """
+        计算下一次轮询间隔：未被推送覆盖的设备按工作状态自适应轮询，推送覆盖的设备只需按校准周期拉取，
+        间隔不超过最大陈旧时长的一半
+        """
+        push_dids = {bololo_device.did for bololo_device in self.devices if bololo_device.push_connected}
+        polled_status_dict = {did: device_status for did, device_status in device_status_dict.items()
+                              if did not in push_dids}
+        max_interval = max(1, self.status_max_staleness // 2)
+        if push_dids:
+            max_interval = min(max_interval, self.push_reconcile_interval)
+        if not polled_status_dict and push_dids:
+            return timedelta(seconds=max_interval)
+        return min(self._adaptive_polling.next_interval(polled_status_dict), timedelta(seconds=max_interval))
+
+    def _needs_refresh(self, bololo_device: BololoDevice) -> bool:
+        """
+        本周期是否需要拉取设备状态：推送覆盖的设备在状态超过校准周期一半后才拉取，
+        下一次轮询最晚在一个校准周期后，状态不会超过最大陈旧时长
+        """
+        if not bololo_device.push_connected:
+            return True
+        return bololo_device.device_status_age >= self.push_reconcile_interval / 2
+
+    async def _async_update_data(self) -> dict[str, BololoDisinfectionCabinetStatus]:
+        """
+        拉取设备状态，推送覆盖且状态足够新的设备本周期跳过
+        """
+        bololo_devices = [bololo_device for bololo_device in self.devices if self._needs_refresh(bololo_device)]
+        start_jitter, self._startup_jitter = self._startup_jitter, 0.0
+        result = await async_refresh_fleet_status(bololo_devices, self.refresh_concurrency, start_jitter)
+        self._last_fleet_refresh_result = result
+        if bololo_devices and len(result.errors) == len(self.devices):
+            raise UpdateFailed(f"request device status failed for all devices: {result.errors}")
+        device_status_dict = {
+            bololo_device.did: bololo_device.last_device_status
+            for bololo_device in self.devices
+            if bololo_device not in bololo_devices and bololo_device.last_device_status is not None
+        }
+        device_status_dict.update(result.device_status)
+        for bololo_device in bololo_devices:
+            err = result.errors.get(bololo_device.did)
+            if err is None:
+                self._save_device_status(bololo_device)
+                continue
+            _LOGGER.warning("call _async_update_data , request device %s status failed : %s", bololo_device.did, err)
+            if bololo_device.available:
+                # 未超过最大陈旧时长，继续使用缓存的状态
+                device_status_dict[bololo_device.did] = bololo_device.last_device_status
+        _LOGGER.debug("call _async_update_data , device status updated for : %s", list(result.device_status))
+        # 根据工作状态和推送覆盖情况调整下一次轮询间隔
+        self.update_interval = self._next_update_interval(device_status_dict)  # pylint: disable=attribute-defined-outside-init
+        self._schedule_cycle_end_refresh(device_status_dict)
+        return device_status_dict
+
+    @callback
+    def _schedule_cycle_end_refresh(self, device_status_dict: dict[str, BololoDisinfectionCabinetStatus]) -> None:
+        """
+        在预测的最早结束的工作周期结束时刻单独刷新一次，与轮询周期无关（推送覆盖的设备也只按校准周期拉取），
+        每次拉取后按最新的剩余时间重新安排
+        """
+        self._cancel_scheduled_cycle_end_refresh()
+        cycle_end = self._adaptive_polling.predict_cycle_end(device_status_dict)
+        if cycle_end is None:
+            return
+        _LOGGER.debug("call _schedule_cycle_end_refresh , refresh in %ss", cycle_end + CYCLE_END_REFRESH_DELAY)
+        self._cancel_cycle_end_refresh = async_call_later(
+            self.hass, cycle_end + CYCLE_END_REFRESH_DELAY, self._async_handle_cycle_end
+        )
+
+    @callback
+    def _cancel_scheduled_cycle_end_refresh(self) -> None:
+        """
+        取消尚未到期的工作周期结束刷新
+        """
+        if self._cancel_cycle_end_refresh is not None:
+            self._cancel_cycle_end_refresh()
+            self._cancel_cycle_end_refresh = None
+
+    async def _async_handle_cycle_end(self, _now) -> None:
+        """
+        预测的工作周期结束，刷新设备状态
+        """
+        self._cancel_cycle_end_refresh = None
+        _LOGGER.debug("call _async_handle_cycle_end , refresh device status at predicted cycle end")
+        await self.async_request_refresh()
+
+    async def async_shutdown(self) -> None:
+        """
+        停止定时刷新和工作周期结束刷新
+        """
+        self._cancel_scheduled_cycle_end_refresh()
+        await DataUpdateCoordinator.async_shutdown(self)
@@ -9,6 +9,7 @@ from homeassistant.helpers.entity import  Entity
 
 from .api_client import BololoApiClient
 from .device_type import BololoDeviceType
+from .token_manager import BololoTokenManager
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -18,9 +19,15 @@ class BololoDevice(ABC):
     """
     bololo 抽象设备类
     """
-    def __init__(self, device_type: BololoDeviceType, bololo_api_client: BololoApiClient):
+    def __init__(
+            self,
+            device_type: BololoDeviceType,
+            bololo_api_client: BololoApiClient,
+            token_manager: BololoTokenManager,
+    ):
         self._device_type = device_type
         self._api_client = bololo_api_client
+        self._token_manager = token_manager
 
     @property
     def api_client(self) -> BololoApiClient:
@@ -29,6 +36,13 @@ class BololoDevice(ABC):
         """
         return self._api_client
 
+    @property
+    def token_manager(self) -> BololoTokenManager:
+        """
+        返回 token 管理器
+        """
+        return self._token_manager
+
     @property
     def device_type(self):
         """
@@ -36,8 +50,33 @@ class BololoDevice(ABC):
         """
         return self._device_type
 
+    @property
+    @abstractmethod
+    def did(self) -> str:
+        """
+        获取设备 did
+        """
+
     @abstractmethod
     def get_entities(self) -> list[Entity]:
         """
         获取设备支持的entity
         """
+
+    @property
+    @abstractmethod
+    def last_device_status(self):
+        """
+        同步读取缓存的设备状态，不做 I/O
+        """
+
+    @abstractmethod
+    async def async_refresh_device_status(self):
+        """
+        从服务端拉取最新设备状态
+        """
+
+    def shutdown(self) -> None:
+        """
+        设备被移除或配置条目卸载时调用，取消设备的后台任务
+        """
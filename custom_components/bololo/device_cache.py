@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+"""
+设备列表与设备状态的本地缓存
+"""
+from __future__ import annotations
+
+import logging
+import time
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN, DEVICE_CACHE_SAVE_DELAY
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_VERSION = 1
+
+
+class BololoDeviceCache:
+    """
+    使用 HA Store 持久化最近一次 list_device 结果和每台设备最近一次状态，
+    启动时可以不等待云端，直接用缓存创建设备和实体
+    """
+
+    def __init__(self, hass: HomeAssistant, entry_id: str):
+        self._store: Store[dict[str, Any]] = Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry_id}")
+        self._device_list: list[dict[str, Any]] | None = None
+        self._device_status: dict[str, dict[str, Any]] = {}
+        self._ignored_dids: set[str] = set()
+
+    async def async_load(self) -> None:
+        """
+        读取缓存
+        """
+        data = await self._store.async_load() or {}
+        self._device_list = data.get("device_list")
+        self._device_status = data.get("device_status") or {}
+        self._ignored_dids = set(data.get("ignored_dids") or [])
+        _LOGGER.debug("call async_load , cached device list : %s", self._device_list)
+
+    @property
+    def device_list(self) -> list[dict[str, Any]] | None:
+        """
+        返回缓存的设备列表，没有缓存时返回 None
+        """
+        return self._device_list
+
+    @property
+    def ignored_dids(self) -> set[str]:
+        """
+        返回通过 remove_device 服务移除、重新发现时需要跳过的设备 did
+        """
+        return self._ignored_dids
+
+    @callback
+    def set_device_ignored(self, did: str, ignored: bool) -> None:
+        """
+        标记设备在重新发现时是否跳过
+        """
+        if ignored:
+            self._ignored_dids.add(did)
+        else:
+            self._ignored_dids.discard(did)
+        self._store.async_delay_save(self._data_to_save, DEVICE_CACHE_SAVE_DELAY)
+
+    def get_device_status(self, did: str) -> tuple[dict[str, Any], int] | None:
+        """
+        返回缓存的设备状态和缓存时的时间戳（毫秒）
+        """
+        cached = self._device_status.get(did)
+        if cached is None:
+            return None
+        return cached.get("status_info"), cached.get("timestamp_ms")
+
+    @callback
+    def save_device_list(self, device_list: list[dict[str, Any]]) -> None:
+        """
+        缓存设备列表
+        """
+        self._device_list = device_list
+        dids = {device_item.get("did") for device_item in device_list}
+        self._device_status = {did: cached for did, cached in self._device_status.items() if did in dids}
+        self._store.async_delay_save(self._data_to_save, DEVICE_CACHE_SAVE_DELAY)
+
+    @callback
+    def save_device_status(self, did: str, status_info: dict[str, Any], timestamp_ms: int | None = None) -> None:
+        """
+        缓存设备状态，合并写盘
+        """
+        self._device_status[did] = {
+            "status_info": status_info,
+            "timestamp_ms": timestamp_ms or int(round(time.time() * 1000)),
+        }
+        self._store.async_delay_save(self._data_to_save, DEVICE_CACHE_SAVE_DELAY)
+
+    async def async_save(self) -> None:
+        """
+        立即写盘，取消尚未到期的合并写盘
+        """
+        await self._store.async_save(self._data_to_save())
+
+    async def async_remove(self) -> None:
+        """
+        删除缓存文件
+        """
+        await self._store.async_remove()
+
+    @callback
+    def _data_to_save(self) -> dict[str, Any]:
+        return {
+            "device_list": self._device_list,
+            "device_status": self._device_status,
+            "ignored_dids": sorted(self._ignored_dids),
+        }
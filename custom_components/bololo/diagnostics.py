@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+"""
+诊断信息
+"""
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.core import HomeAssistant
+
+from .const import FIELD_NAME_MQTT_BROKER
+from .runtime_data import BololoConfigEntry
+
+TO_REDACT = {FIELD_NAME_MQTT_BROKER}
+
+
+# pylint: disable=unused-argument
+async def async_get_config_entry_diagnostics(hass: HomeAssistant, config_entry: BololoConfigEntry) -> dict[str, Any]:
+    """
+    返回配置条目的诊断信息：轮询与批量刷新情况、请求排队统计、每台设备省去的控制请求数等
+    """
+    runtime_data = config_entry.runtime_data
+    coordinator = runtime_data.coordinator
+    fleet_refresh_result = coordinator.last_fleet_refresh_result
+    return {
+        "options": async_redact_data(dict(config_entry.options), TO_REDACT),
+        "update_interval": coordinator.update_interval.total_seconds() if coordinator.update_interval else None,
+        "skipped_command_count": coordinator.skipped_command_count,
+        "queue_wait_stats": runtime_data.api_client.queue_wait_stats,
+        "last_fleet_refresh": None if fleet_refresh_result is None else {
+            "failed": {did: str(err) for did, err in fleet_refresh_result.errors.items()},
+            "elapsed": fleet_refresh_result.elapsed,
+            "max_latency": fleet_refresh_result.max_latency,
+            "total_latency": fleet_refresh_result.total_latency,
+        },
+        "devices": {
+            bololo_device.did: {
+                "available": bololo_device.available,
+                "push_connected": bololo_device.push_connected,
+                "device_status_age": (
+                    bololo_device.device_status_age if bololo_device.device_status_timestamp_ms is not None else None
+                ),
+                "device_status_restored": bololo_device.device_status_restored,
+                "pending_fields": dict(bololo_device.pending_fields),
+                "skipped_command_count": bololo_device.skipped_command_count,
+            }
+            for bololo_device in runtime_data.devices
+        },
+    }
@@ -0,0 +1,232 @@
+# -*- coding: utf-8 -*-
+"""
+设备发现：按 did 增量对比云端设备列表，只增删有变化的设备
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Any
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import Platform
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import device_registry as dr
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+
+from .api_client import BololoApiClient
+from .const import DOMAIN
+from .coordinator import BololoDataUpdateCoordinator
+from .device import BololoDevice
+from .device_cache import BololoDeviceCache
+from .device_type import BololoDeviceType, get_device_type_by_product_key
+from .disinfection_cabinet import BololoDisinfectionCabinet
+from .token_manager import BololoTokenManager
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class BololoDeviceDiscovery:
+    # pylint: disable=too-many-instance-attributes
+    """
+    管理配置条目下的设备集合：
+    启动时根据设备列表创建设备，之后按 did 与云端设备列表做差量，
+    新增设备只创建它自己的实体，移除设备只清理它自己的实体和设备注册表条目
+    """
+
+    # pylint: disable=too-many-arguments,too-many-positional-arguments
+    def __init__(
+            self,
+            hass: HomeAssistant,
+            config_entry: ConfigEntry,
+            device_cache: BololoDeviceCache,
+            coordinator: BololoDataUpdateCoordinator,
+            bololo_api_client: BololoApiClient,
+            token_manager: BololoTokenManager,
+            bololo_devices: list[BololoDevice],
+    ):
+        self._hass = hass
+        self._config_entry = config_entry
+        self._device_cache = device_cache
+        self._coordinator = coordinator
+        self._api_client = bololo_api_client
+        self._token_manager = token_manager
+        # 与协调器共享的设备列表，原地增删
+        self._devices = bololo_devices
+        # 所有设备类型的平台在配置条目设置时一次性转发，之后新增的设备不需要再设置平台
+        self._platforms: list[Platform] = list(dict.fromkeys(
+            platform for device_type in BololoDeviceType for platform in device_type.platforms
+        ))
+        self._platform_entities: dict[Platform, tuple[type, AddEntitiesCallback]] = {}
+        self._push_clients: dict | None = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def devices(self) -> list[BololoDevice]:
+        """
+        返回当前的设备
+        """
+        return self._devices
+
+    @property
+    def platforms(self) -> list[Platform]:
+        """
+        返回配置条目需要设置的平台
+        """
+        return self._platforms
+
+    def set_push_clients(self, push_clients: dict) -> None:
+        """
+        设置 MQTT 推送连接，新增和移除的设备同步订阅或取消订阅
+        """
+        self._push_clients = push_clients
+
+    @callback
+    def register_platform(self, platform: Platform, entity_cls: type, async_add_entities: AddEntitiesCallback) -> None:
+        """
+        平台设置完成时登记添加实体的回调，之后新增设备的实体通过它添加
+        """
+        self._platform_entities[platform] = (entity_cls, async_add_entities)
+
+    @callback
+    def create_devices(self, device_list: list[dict[str, Any]]) -> list[BololoDevice]:
+        """
+        根据设备列表创建设备并注册到设备注册表，跳过不支持的设备、已存在的设备和被移除的设备
+        """
+        device_registry = dr.async_get(self._hass)
+        known_dids = {bololo_device.did for bololo_device in self._devices}
+        bololo_devices = []
+        for device_item in device_list:
+            did = device_item.get("did")
+            if did in known_dids or did in self._device_cache.ignored_dids:
+                continue
+            bololo_device_type = get_device_type_by_product_key(device_item["productKey"])
+            if bololo_device_type is None or bololo_device_type.platforms is None:
+                _LOGGER.debug("call create_devices , but device_type : %s for %s", bololo_device_type,
+                              device_item["productKey"])
+                continue
+            if bololo_device_type == BololoDeviceType.DISINFECTION_CABINET:
+                # 创建设备
+                bololo_device = BololoDisinfectionCabinet(
+                    device_info_from_server=device_item,
+                    hass=self._hass,
+                    config_entry=self._config_entry,
+                    coordinator=self._coordinator,
+                    bololo_api_client=self._api_client,
+                    token_manager=self._token_manager,
+                )
+                device_entry = device_registry.async_get_or_create(
+                    config_entry_id=self._config_entry.entry_id,
+                    identifiers={(DOMAIN, did)},
+                    name=device_item.get('name'),
+                    manufacturer=device_item.get('manufacturer', 'Bololo'),
+                    model=device_item.get('model', bololo_device_type.DISINFECTION_CABINET.name),
+                    sw_version=device_item.get('firmware_version', 'UnknownSW'),
+                    hw_version=device_item.get('hardware_version', 'UnknownHW'),
+                )
+                bololo_device.device_entry = device_entry
+                cached_status = self._device_cache.get_device_status(did)
+                if cached_status is not None:
+                    bololo_device.restore_device_status(*cached_status)
+                bololo_devices.append(bololo_device)
+                known_dids.add(did)
+        self._devices.extend(bololo_devices)
+        return bololo_devices
+
+    async def async_rediscover(self) -> tuple[list[str], list[str]]:
+        """
+        拉取云端设备列表，与当前设备按 did 对比，返回新增和移除的 did
+        """
+        device_list = await self._token_manager.async_call(self._api_client.list_device)
+        async with self._lock:
+            self._device_cache.save_device_list(device_list)
+            server_dids = {device_item.get("did") for device_item in device_list}
+            removed_dids = [
+                bololo_device.did for bololo_device in self._devices
+                if bololo_device.did not in server_dids or bololo_device.did in self._device_cache.ignored_dids
+            ]
+            for did in removed_dids:
+                await self._async_remove_device(did)
+            added_dids = [bololo_device.did for bololo_device in await self._async_add_devices(device_list)]
+        if added_dids or removed_dids:
+            _LOGGER.info("bololo devices rediscovered , added : %s , removed : %s", added_dids, removed_dids)
+        return added_dids, removed_dids
+
+    async def async_add_device(self, did: str) -> bool:
+        """
+        添加云端设备列表中的指定设备（包括之前通过 remove_device 移除的设备），设备不存在时返回 False
+        """
+        self._device_cache.set_device_ignored(did, False)
+        await self.async_rediscover()
+        return any(bololo_device.did == did for bololo_device in self._devices)
+
+    async def async_remove_device(self, did: str) -> bool:
+        """
+        移除指定设备，之后的重新发现会跳过它，设备不存在时返回 False
+        """
+        async with self._lock:
+            if not any(bololo_device.did == did for bololo_device in self._devices):
+                return False
+            self._device_cache.set_device_ignored(did, True)
+            await self._async_remove_device(did)
+        _LOGGER.info("bololo device %s removed", did)
+        return True
+
+    async def async_shutdown(self) -> None:
+        """
+        配置条目卸载时取消所有设备的后台任务、释放设备，并立即保存缓存供下次启动使用
+        """
+        for bololo_device in self._devices:
+            bololo_device.shutdown()
+        self._devices.clear()
+        self._platform_entities.clear()
+        self._push_clients = None
+        await self._device_cache.async_save()
+
+    async def _async_add_devices(self, device_list: list[dict[str, Any]]) -> list[BololoDevice]:
+        """
+        创建新增的设备，通过各平台登记的回调添加实体
+        """
+        bololo_devices = self.create_devices(device_list)
+        if not bololo_devices:
+            return bololo_devices
+        for platform, (entity_cls, async_add_entities) in self._platform_entities.items():
+            new_entities = [
+                entity
+                for bololo_device in bololo_devices
+                for entity in bololo_device.get_entities()
+                if isinstance(entity, entity_cls)
+            ]
+            _LOGGER.debug("call _async_add_devices , platform %s new_entities : %s", platform, new_entities)
+            if new_entities:
+                async_add_entities(new_entities)
+        if self._push_clients is not None:
+            # pylint: disable=import-outside-toplevel
+            from .mqtt_push import add_push_device
+
+            for bololo_device in bololo_devices:
+                add_push_device(self._hass, self._config_entry, self._coordinator, self._push_clients,
+                                bololo_device)
+        # 新设备的状态随下一次批量刷新拉取
+        await self._coordinator.async_request_refresh()
+        return bololo_devices
+
+    async def _async_remove_device(self, did: str) -> None:
+        """
+        移除设备的实体、设备注册表条目、推送订阅和状态
+        """
+        bololo_device = next(bololo_device for bololo_device in self._devices if bololo_device.did == did)
+        self._devices.remove(bololo_device)
+        bololo_device.shutdown()
+        if self._push_clients is not None:
+            for push_client in self._push_clients.values():
+                push_client.remove_device(did)
+        for entity in bololo_device.get_entities():
+            if entity.hass is not None:
+                await entity.async_remove(force_remove=True)
+        device_registry = dr.async_get(self._hass)
+        device_entry = device_registry.async_get_device(identifiers={(DOMAIN, did)})
+        if device_entry is not None:
+            # 设备不再属于任何配置条目时会被删除，其实体注册表条目随之删除
+            device_registry.async_update_device(device_entry.id, remove_config_entry_id=self._config_entry.entry_id)
+        self._coordinator.remove_device_status(did)
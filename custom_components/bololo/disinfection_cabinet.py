@@ -11,12 +11,17 @@ import time
 
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import Platform
-from homeassistant.core import HomeAssistant
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
 from homeassistant.helpers.device_registry import DeviceInfo, DeviceEntry
 from homeassistant.helpers.entity import Entity
 
-from .const import (DOMAIN)
-from .api_client import BololoApiClient
+from .const import (DOMAIN, CONTROL_CONFIRM_POLL_DELAYS)
+from .api_client import BololoApiClient, BololoApiClientError
+from .bololo_entity import BololoEntity
+from .command_buffer import BololoCommandBuffer
+from .token_manager import BololoTokenManager
+from .coordinator import BololoDataUpdateCoordinator
 # pylint: disable=line-too-long
 from .device import BololoDevice, BololoDeviceType
 from .disinfection_cabinet_button import DisinfectionCabinetButton
@@ -30,7 +35,7 @@ _LOGGER = logging.getLogger(__name__)
 
 
 class BololoDisinfectionCabinet(BololoDevice):
-    # pylint: disable=too-many-instance-attributes
+    # pylint: disable=too-many-instance-attributes,too-many-public-methods
     """
         "sno": "111111",
         "productKey": "111111",
@@ -59,20 +64,23 @@ class BololoDisinfectionCabinet(BololoDevice):
         "muserId": null
     """
 
+    # pylint: disable=too-many-arguments,too-many-positional-arguments,too-many-statements
     def __init__(
             self, device_info_from_server: dict[str, Any],
             hass: HomeAssistant,
-            config_entry: ConfigEntry
+            config_entry: ConfigEntry,
+            coordinator: BololoDataUpdateCoordinator,
+            bololo_api_client: BololoApiClient,
+            token_manager: BololoTokenManager,
     ):
         self._hass = hass
         self._config_entry = config_entry
+        self._coordinator = coordinator
         BololoDevice.__init__(
             self,
             BololoDeviceType.DISINFECTION_CABINET,
-            BololoApiClient(
-                self._config_entry.data.get("app_key"),
-                self._config_entry.data.get("mobile"),
-            )
+            bololo_api_client,
+            token_manager,
         )
         self._device_entry = None
         self._sno = device_info_from_server.get("sno")
@@ -94,6 +102,7 @@ class BololoDisinfectionCabinet(BololoDevice):
         self._district = device_info_from_server.get("district")
         self._address = device_info_from_server.get("address")
         self._online_status = device_info_from_server.get("onlineStatus")
+        self._mqtt_info = None
         if device_info_from_server.get("mqttInfo") is not None:
             self._mqtt_info = {
                 "cluster_name": device_info_from_server.get("mqttInfo").get("clusterName"),
@@ -101,9 +110,25 @@ class BololoDisinfectionCabinet(BololoDevice):
                 "cluster_mqtt_port": device_info_from_server.get("mqttInfo").get("clusterMqttPort"),
             }
         self._device_status_request_timestamp_ms = None
+        self._status_max_staleness = coordinator.status_max_staleness
         self._device_status_request_lock = asyncio.Lock()
+        self._device_status_restored = False
+        self._push_connected = False
+        self._command_buffer = BololoCommandBuffer(hass, config_entry, self._async_send_command)
         self._device_status = None
+        # 最近一次设备上报的状态，不含尚未确认的控制字段
+        self._confirmed_device_status: BololoDisinfectionCabinetStatus | None = None
+        # 已控制、等待设备确认的字段及期望值
+        self._pending_fields: dict[str, Any] = {}
+        self._confirm_task: asyncio.Task | None = None
+        self._skipped_command_count = 0
         self._entities = []
+        # 按状态字段索引已添加到 HA 的实体，状态变化时只通知相关字段的实体
+        self._entities_by_field: dict[str, list[BololoEntity]] = {}
+        self._listening_entities: list[BololoEntity] = []
+        self._remove_coordinator_listener: CALLBACK_TYPE | None = None
+        self._dispatched_device_status: BololoDisinfectionCabinetStatus | None = None
+        self._dispatched_flags: tuple[bool, bool] | None = None
         self._device_info = DeviceInfo(
             identifiers={(DOMAIN, self._did)},
             name=self._name,
@@ -115,15 +140,15 @@ class BololoDisinfectionCabinet(BololoDevice):
         )
         for function in BololoDisinfectionCabinetFunction:
             if function.platform == Platform.SWITCH:
-                disinfection_cabinet_switch = DisinfectionCabinetSwitch(config_entry, function)
+                disinfection_cabinet_switch = DisinfectionCabinetSwitch(config_entry, coordinator, function)
                 disinfection_cabinet_switch.set_disinfection_cabinet(self)
                 self._entities.append(disinfection_cabinet_switch)
             elif function.platform == Platform.BUTTON:
-                disinfection_cabinet_button = DisinfectionCabinetButton(config_entry, function)
+                disinfection_cabinet_button = DisinfectionCabinetButton(config_entry, coordinator, function)
                 disinfection_cabinet_button.set_disinfection_cabinet(self)
                 self._entities.append(disinfection_cabinet_button)
             elif function.platform == Platform.SELECT:
-                disinfection_cabinet_select = DisinfectionCabinetSelect(config_entry, function)
+                disinfection_cabinet_select = DisinfectionCabinetSelect(config_entry, coordinator, function)
                 disinfection_cabinet_select.set_disinfection_cabinet(self)
                 self._entities.append(disinfection_cabinet_select)
 
@@ -142,44 +167,168 @@ class BololoDisinfectionCabinet(BololoDevice):
         """
         self._device_entry = device_entry
 
+    @callback
+    def apply_pushed_device_status(self, status_info: dict[str, Any]) -> BololoDisinfectionCabinetStatus:
+        """
+        合并推送的设备状态到缓存中
+        """
+        if self._confirmed_device_status is None:
+            self._set_confirmed_device_status(BololoDisinfectionCabinetStatus(status_info))
+        else:
+            self._set_confirmed_device_status(self._confirmed_device_status.merge(status_info))
+        self._device_status_request_timestamp_ms = int(round(time.time() * 1000))
+        self._device_status_restored = False
+        return self._device_status
+
+    @callback
+    def restore_device_status(self, status_info: dict[str, Any], timestamp_ms: int) -> None:
+        """
+        使用本地缓存的设备状态初始化，时间戳保持缓存时的值，过期判断照常生效
+        """
+        if self._device_status is not None:
+            return
+        self._set_confirmed_device_status(BololoDisinfectionCabinetStatus(status_info))
+        self._device_status_request_timestamp_ms = timestamp_ms
+        self._device_status_restored = True
+
+    @property
+    def device_status_restored(self) -> bool:
+        """
+        当前状态是否来自本地缓存，尚未从云端刷新
+        """
+        return self._device_status_restored
+
+    @property
+    def device_status_timestamp_ms(self) -> int | None:
+        """
+        Return the timestamp (ms) of the cached device status
+        """
+        return self._device_status_request_timestamp_ms
+
+    @property
+    def device_status_age(self) -> float:
+        """
+        Return the age of the cached device status in seconds
+        """
+        if self._device_status_request_timestamp_ms is None:
+            return float("inf")
+        return (int(round(time.time() * 1000)) - self._device_status_request_timestamp_ms) / 1000
+
     @property
-    async def device_status(self) -> BololoDisinfectionCabinetStatus:
+    def available(self) -> bool:
         """
-        Return the device status
+        缓存的设备状态未超过最大陈旧时长时可用
+        """
+        return self._device_status is not None and self.device_status_age <= self._status_max_staleness
+
+    @property
+    def push_connected(self) -> bool:
+        """
+        设备状态是否由已连接的 MQTT 推送实时更新
+        """
+        return self._push_connected
+
+    @push_connected.setter
+    def push_connected(self, push_connected: bool):
+        """
+        设置设备状态是否由已连接的 MQTT 推送实时更新
+        """
+        self._push_connected = push_connected
+
+    @property
+    def status_max_staleness(self) -> int:
+        """
+        Return the max staleness of the device status in seconds
+        """
+        return self._status_max_staleness
+
+    @status_max_staleness.setter
+    def status_max_staleness(self, status_max_staleness: int):
+        """
+        Set the max staleness of the device status in seconds
+        """
+        self._status_max_staleness = status_max_staleness
+
+    @property
+    def last_device_status(self) -> BololoDisinfectionCabinetStatus | None:
+        """
+        同步读取缓存的设备状态，不做任何 I/O，可在实体属性中安全调用，状态由协调器按轮询周期刷新
+        """
+        return self._device_status
+
+    async def async_refresh_device_status(self) -> BololoDisinfectionCabinetStatus:
+        """
+        忽略缓存，从服务端拉取最新设备状态
         """
-        _LOGGER.debug("call device_status , wait lock")
         async with self._device_status_request_lock:
-            _LOGGER.debug("call device_status , got lock")
-            if self._device_status is None:
-                _LOGGER.debug(
-                    "call device_status , request device status from server , because device status is None")
-                self._device_status = BololoDisinfectionCabinetStatus(
-                    await self._api_client.get_device_status(
-                        auth_token=self._config_entry.data.get("token").get("userToken"),
-                        product_key=self._product_key,
-                        mac=self._mac
-                    )
-                )
-                self._device_status_request_timestamp_ms = int(round(time.time() * 1000))
-                return self._device_status
-
-            current_timestamp_ms = int(round(time.time() * 1000))
-            if current_timestamp_ms - self._device_status_request_timestamp_ms > 10 * 1000:
-                _LOGGER.debug(
-                    "call device_status , request device status from server , because device status is older than 10s"
-                )
-                self._device_status = BololoDisinfectionCabinetStatus(
-                    await self._api_client.get_device_status(
-                        auth_token=self._config_entry.data.get("token").get("userToken"),
-                        product_key=self._product_key,
-                        mac=self._mac
-                    )
-                )
-                self._device_status_request_timestamp_ms = int(round(time.time() * 1000))
-                return self._device_status
-
-            _LOGGER.debug("call device_status , use cached device status")
-            return self._device_status
+            return await self._async_request_device_status()
+
+    async def _async_request_device_status(self) -> BololoDisinfectionCabinetStatus:
+        """
+        请求设备状态并更新缓存，调用方需持有 _device_status_request_lock
+        """
+        self._set_confirmed_device_status(BololoDisinfectionCabinetStatus(
+            await self._token_manager.async_call(
+                self._api_client.get_device_status,
+                product_key=self._product_key,
+                mac=self._mac
+            )
+        ))
+        self._device_status_request_timestamp_ms = int(round(time.time() * 1000))
+        self._device_status_restored = False
+        return self._device_status
+
+    @callback
+    def async_add_entity_listener(self, entity: BololoEntity) -> CALLBACK_TYPE:
+        """
+        实体添加到 HA 后登记，之后只在它关注的字段变化时被通知，返回取消登记的回调
+        """
+        self._listening_entities.append(entity)
+        for field in entity.status_fields:
+            self._entities_by_field.setdefault(field, []).append(entity)
+        if self._remove_coordinator_listener is None:
+            # 每台设备只向协调器登记一个监听，由设备对比状态后分发给实体
+            self._remove_coordinator_listener = self._coordinator.async_add_listener(
+                self._handle_coordinator_update
+            )
+
+        @callback
+        def _remove_entity_listener() -> None:
+            self._listening_entities.remove(entity)
+            for field in entity.status_fields:
+                self._entities_by_field[field].remove(entity)
+            if not self._listening_entities and self._remove_coordinator_listener is not None:
+                self._remove_coordinator_listener()
+                self._remove_coordinator_listener = None
+
+        return _remove_entity_listener
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """
+        协调器数据更新：与上次分发的状态对比，只通知字段发生变化的实体
+        可用性或 stale 标记变化时通知所有实体
+        """
+        device_status = self._device_status
+        flags = (self.available, self._device_status_restored)
+        if device_status is self._dispatched_device_status and flags == self._dispatched_flags:
+            return
+        if (flags != self._dispatched_flags or device_status is None
+                or self._dispatched_device_status is None):
+            entities = list(self._listening_entities)
+        else:
+            entities = []
+            for field in device_status.changed_fields(self._dispatched_device_status):
+                for entity in self._entities_by_field.get(field, ()):
+                    if entity not in entities:
+                        entities.append(entity)
+            if entities:
+                _LOGGER.debug("call _handle_coordinator_update , device %s notify %s entities", self._did,
+                              len(entities))
+        self._dispatched_device_status = device_status
+        self._dispatched_flags = flags
+        for entity in entities:
+            entity.handle_device_status_update()
 
     @property
     def device_info(self) -> DeviceInfo:
@@ -195,6 +344,20 @@ class BololoDisinfectionCabinet(BololoDevice):
         _LOGGER.debug("call get_entities , entities : %s", self._entities)
         return self._entities
 
+    @property
+    def did(self) -> str:
+        """
+        Return the did
+        """
+        return self._did
+
+    @property
+    def mqtt_info(self) -> dict[str, Any] | None:
+        """
+        Return the mqtt cluster info
+        """
+        return self._mqtt_info
+
     @property
     def mac(self) -> str:
         """
@@ -202,19 +365,156 @@ class BololoDisinfectionCabinet(BololoDevice):
         """
         return self._mac
 
-    async def async_control_switch(self, switch_function_on_server: str, status: bool) -> None:
+    @callback
+    def shutdown(self) -> None:
+        """
+        取消尚未发送的命令和进行中的确认轮询
+        """
+        self._command_buffer.cancel()
+        if self._remove_coordinator_listener is not None:
+            self._remove_coordinator_listener()
+            self._remove_coordinator_listener = None
+        if self._confirm_task is not None and not self._confirm_task.done():
+            self._confirm_task.cancel()
+        self._confirm_task = None
+
+    @callback
+    def _set_confirmed_device_status(self, device_status: BololoDisinfectionCabinetStatus) -> None:
+        """
+        设备上报了新状态：已与期望值一致的控制字段视为确认，其余仍在等待确认的字段继续覆盖显示
+        """
+        self._confirmed_device_status = device_status
+        for field, value in list(self._pending_fields.items()):
+            if device_status.get_field(field) == value:
+                _LOGGER.debug("call _set_confirmed_device_status , device %s confirmed %s=%s", self._did, field, value)
+                del self._pending_fields[field]
+        self._device_status = device_status.merge(self._pending_fields) if self._pending_fields else device_status
+
+    @property
+    def confirmed_device_status(self) -> BololoDisinfectionCabinetStatus | None:
+        """
+        最近一次设备上报的状态，不含尚未确认的控制字段
+        """
+        return self._confirmed_device_status
+
+    @property
+    def pending_fields(self) -> dict[str, Any]:
+        """
+        已控制、等待设备确认的字段
+        """
+        return self._pending_fields
+
+    @property
+    def skipped_command_count(self) -> int:
         """
-        控制设备开关
+        因状态已一致而省去的控制请求数
+        """
+        return self._skipped_command_count
+
+    async def async_control_switch(self, switch_function_on_server: str, status: bool, force: bool = False) -> None:
+        """
+        控制设备开关，短时间内的多次控制合并为一次请求
         """
         _LOGGER.debug("call async_control_switch , switch_function_on_server : %s , status : %s",
                       switch_function_on_server, status)
-        await self._api_client.control_device(
-            auth_token=self._config_entry.data.get("token").get("userToken"),
+        await self.async_control({switch_function_on_server: status}, force)
+
+    async def async_control(self, command_data: dict[str, Any], force: bool = False) -> None:
+        """
+        乐观控制：立即把命令应用到状态快照并通知实体，字段标记为等待确认；
+        发送失败时回滚并抛出 HomeAssistantError，发送成功后短时间内轮询几次确认，仍未确认则回滚
+        force 为 False 时，足够新的状态快照中已经是目标值的字段不再发送
+        """
+        if not force and self._coordinator.skip_redundant_commands:
+            command_data = self._drop_redundant_fields(command_data)
+            if not command_data:
+                return
+        self._pending_fields.update(command_data)
+        if self._confirmed_device_status is not None:
+            self._device_status = self._confirmed_device_status.merge(self._pending_fields)
+            self._coordinator.async_publish_device_status(self)
+        try:
+            await self._command_buffer.async_write(command_data)
+        except (BololoApiClientError, TimeoutError) as err:
+            self._rollback_pending_fields(command_data)
+            raise HomeAssistantError(f"control bololo device {self._did} failed: {err}") from err
+        self._async_schedule_confirmation()
+
+    @callback
+    def _drop_redundant_fields(self, command_data: dict[str, Any]) -> dict[str, Any]:
+        """
+        去掉状态快照中已经是目标值的字段，快照来自本地缓存或比协调器的轮询周期更旧时不做判断
+        """
+        device_status = self._device_status
+        if (device_status is None or self._device_status_restored
+                or self.device_status_age > self._coordinator.trusted_status_age(self)):
+            return command_data
+        command_data = {field: value for field, value in command_data.items() if device_status.get_field(field) != value}
+        if not command_data:
+            self._skipped_command_count += 1
+            _LOGGER.debug("call _drop_redundant_fields , device %s already in requested state , skipped %s command(s)",
+                          self._did, self._skipped_command_count)
+        return command_data
+
+    @callback
+    def _rollback_pending_fields(self, command_data: dict[str, Any]) -> None:
+        """
+        放弃等待确认的字段，状态恢复为设备最近一次上报的值
+        之后排队的命令已把字段改成其他值时保留该字段，由那条命令自己确认或回滚
+        """
+        for field, value in command_data.items():
+            if field in self._pending_fields and self._pending_fields[field] == value:
+                del self._pending_fields[field]
+        if self._confirmed_device_status is None:
+            return
+        self._device_status = (
+            self._confirmed_device_status.merge(self._pending_fields)
+            if self._pending_fields else self._confirmed_device_status
+        )
+        self._coordinator.async_publish_device_status(self)
+
+    @callback
+    def _async_schedule_confirmation(self) -> None:
+        """
+        重新开始一轮确认轮询，新的控制命令会延长等待时间
+        """
+        if self._confirm_task is not None and not self._confirm_task.done():
+            self._confirm_task.cancel()
+        self._confirm_task = self._config_entry.async_create_background_task(
+            self._hass,
+            self._async_confirm_pending_fields(),
+            f"{DOMAIN}_confirm_control_{self._did}",
+        )
+
+    async def _async_confirm_pending_fields(self) -> None:
+        """
+        按 CONTROL_CONFIRM_POLL_DELAYS 拉取设备状态确认控制结果，全部轮询后仍未确认的字段回滚
+        """
+        for delay in CONTROL_CONFIRM_POLL_DELAYS:
+            await asyncio.sleep(delay)
+            if not self._pending_fields:
+                return
+            try:
+                await self.async_refresh_device_status()
+            except (BololoApiClientError, TimeoutError) as err:
+                _LOGGER.warning("call _async_confirm_pending_fields , refresh device %s status failed : %s",
+                                self._did, err)
+                continue
+            self._coordinator.async_set_device_status(self)
+        if self._pending_fields:
+            _LOGGER.error("bololo device %s did not confirm %s within %ss , rolled back",
+                          self._did, self._pending_fields, sum(CONTROL_CONFIRM_POLL_DELAYS))
+            self._rollback_pending_fields(dict(self._pending_fields))
+
+    async def _async_send_command(self, command_data: dict[str, Any]) -> None:
+        """
+        发送合并后的控制命令
+        """
+        _LOGGER.debug("call _async_send_command , command_data : %s", command_data)
+        await self._token_manager.async_call(
+            self._api_client.control_device,
             product_key=self._product_key,
             mac=self._mac,
-            command_data={
-                switch_function_on_server: status
-            }
+            command_data=command_data
         )
-        if self._device_status is not None:
-            setattr(self._device_status, f"_{switch_function_on_server}", status)
+        self._coordinator.notify_device_activity()
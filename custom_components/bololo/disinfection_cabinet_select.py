@@ -9,19 +9,28 @@ import logging
 
 from homeassistant.components.select import SelectEntity
 from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import CALLBACK_TYPE, State, callback
+from homeassistant.exceptions import HomeAssistantError
 from homeassistant.helpers.device_registry import DeviceInfo
+from homeassistant.helpers.event import async_call_later
 
 from .bololo_entity import BololoEntity
-from .const import (DOMAIN)
+from .const import SELECT_DEBOUNCE_COOLDOWN
 from .disinfection_cabinet_function import BololoDisinfectionCabinetFunction
-from .tools import sync_call
 
 # pylint: disable=line-too-long
 
 _LOGGER = logging.getLogger(__name__)
 
 if TYPE_CHECKING:
-    from . import BololoDisinfectionCabinet
+    from .coordinator import BololoDataUpdateCoordinator
+
+OPTION_OFF = "off"
+# 时长选择对应的开关，选择 off 时关闭该开关
+SWITCH_FUNCTIONS = {
+    BololoDisinfectionCabinetFunction.DISINFECTION_TIME: BololoDisinfectionCabinetFunction.DISINFECTION,
+    BololoDisinfectionCabinetFunction.AUTO_TIME: BololoDisinfectionCabinetFunction.AUTO,
+}
 
 
 class DisinfectionCabinetSelect(SelectEntity, BololoEntity):
@@ -33,31 +42,26 @@ class DisinfectionCabinetSelect(SelectEntity, BololoEntity):
     def __init__(
             self,
             config_entry: ConfigEntry,
+            coordinator: BololoDataUpdateCoordinator,
             bololo_disinfection_cabinet_function: BololoDisinfectionCabinetFunction,
     ) -> None:
         SelectEntity.__init__(self)
-        BololoEntity.__init__(self, config_entry, bololo_disinfection_cabinet_function)
+        BololoEntity.__init__(self, config_entry, coordinator, bololo_disinfection_cabinet_function)
         self._disinfection_cabinet = None
         self._bololo_disinfection_cabinet_function = bololo_disinfection_cabinet_function
         self._config_entry: ConfigEntry = config_entry
         self._attr_unique_id = None
-        self._attr_name = self._bololo_disinfection_cabinet_function.function
-        self.entity_id = f"{DOMAIN}.disinfection_cabinet_{self._bololo_disinfection_cabinet_function.function_on_server}"
-        _LOGGER.debug("call init disinfection cabinet select, %s", self.entity_id)
+        _LOGGER.debug("call init disinfection cabinet select, %s", self._bololo_disinfection_cabinet_function)
         self._attr_icon = self._bololo_disinfection_cabinet_function.icon
+        self._switch_function = SWITCH_FUNCTIONS[self._bololo_disinfection_cabinet_function]
+        self._selected_option: str | None = None
+        self._cancel_send: CALLBACK_TYPE | None = None
         if self._bololo_disinfection_cabinet_function == BololoDisinfectionCabinetFunction.DISINFECTION_TIME:
             self._attr_current_option = "20"
-            self._attr_options = ["off", "10", "15", "20"]
+            self._attr_options = [OPTION_OFF, "10", "15", "20"]
         elif self._bololo_disinfection_cabinet_function == BololoDisinfectionCabinetFunction.AUTO_TIME:
             self._attr_current_option = "60"
-            self._attr_options = ["off", "40", "50", "60"]
-
-    def set_disinfection_cabinet(self, disinfection_cabinet: BololoDisinfectionCabinet):
-        """
-        设置 消毒柜对象引用
-        """
-        self._disinfection_cabinet = disinfection_cabinet
-        self._attr_unique_id = f"{self._disinfection_cabinet.mac.lower()}_{self._bololo_disinfection_cabinet_function.function_on_server}"
+            self._attr_options = [OPTION_OFF, "40", "50", "60"]
 
     @property
     def device_info(self) -> DeviceInfo:
@@ -74,38 +78,46 @@ class DisinfectionCabinetSelect(SelectEntity, BololoEntity):
             return self.entity_description.icon
         return None
 
-    async def async_update(self):
+    @property
+    def status_fields(self) -> tuple[str, ...]:
+        """
+        时长字段和对应开关字段变化时都需要更新当前选项
+        """
+        return (
+            self._bololo_disinfection_cabinet_function.function_on_server,
+            self._switch_function.function_on_server,
+        )
+
+    def _update_from_device_status(self) -> None:
         """
-        更新设备信息（基础信息/状态信息），由hass调用
+        根据设备最近一次状态更新当前选项，对应开关关闭时为 off
         """
-        device_status = await self._disinfection_cabinet.device_status
-        _LOGGER.debug("call async_update ,select function %s , device_status : %s",
-                      self._bololo_disinfection_cabinet_function,
-                      device_status.__dict__)
-        disinfection_time = getattr(device_status,
-                                    f"_{BololoDisinfectionCabinetFunction.DISINFECTION_TIME.function_on_server}")
-        auto_time = getattr(device_status, f"_{BololoDisinfectionCabinetFunction.AUTO_TIME.function_on_server}")
-        if self._bololo_disinfection_cabinet_function == BololoDisinfectionCabinetFunction.AUTO_TIME:
-            if auto_time != self._attr_current_option:
-                _LOGGER.debug("call async_update , update %s status for config_entity : %s , auto_time %s -> %s",
-                              self._bololo_disinfection_cabinet_function,
-                              self._config_entry,
-                              self._attr_current_option,
-                              auto_time
-                              )
-                self._attr_current_option = str(auto_time)
-                self.async_write_ha_state()
-        elif self._bololo_disinfection_cabinet_function == BololoDisinfectionCabinetFunction.DISINFECTION_TIME:
-            if disinfection_time != self._attr_current_option:
-                _LOGGER.debug(
-                    "call async_update , update %s status for config_entity : %s , disinfection_time %s -> %s",
-                    self._bololo_disinfection_cabinet_function,
-                    self._config_entry,
-                    self._attr_current_option,
-                    disinfection_time
-                )
-                self._attr_current_option = str(disinfection_time)
-                self.async_write_ha_state()
+        if self._selected_option is not None:
+            # 选项尚未发送，保持用户的选择
+            return
+        device_status = self._disinfection_cabinet.last_device_status
+        if device_status is None:
+            return
+        switch_on = device_status.get(self._switch_function)
+        if switch_on is not None and not switch_on:
+            current_option = OPTION_OFF
+        else:
+            current_option = str(device_status.get(self._bololo_disinfection_cabinet_function))
+        if current_option != self._attr_current_option:
+            _LOGGER.debug("call _update_from_device_status , update %s status for config_entity : %s , option %s -> %s",
+                          self._bololo_disinfection_cabinet_function,
+                          self._config_entry,
+                          self._attr_current_option,
+                          current_option
+                          )
+            self._attr_current_option = current_option
+
+    def _restore_from_last_state(self, last_state: State) -> None:
+        """
+        使用重启前的最后状态初始化当前选项
+        """
+        if last_state.state in self._attr_options:
+            self._attr_current_option = last_state.state
 
     # @property
     # def available(self) -> bool:
@@ -144,10 +156,50 @@ class DisinfectionCabinetSelect(SelectEntity, BololoEntity):
     #     _LOGGER.debug("call disinfection_time select available , %s", disinfection_switch_on)
     #     return disinfection_switch_on
 
-    def select_option(self, option: str) -> None:
-        """Change the selected option."""
-        _LOGGER.debug("call select_option %s, %s", option, self._disinfection_cabinet)
+    async def async_added_to_hass(self):
+        """当实体添加到HA时调用"""
+        await BololoEntity.async_added_to_hass(self)
+        self.async_on_remove(self._async_cancel_send)
 
     async def async_select_option(self, option: str) -> None:
         """Change the selected option."""
         _LOGGER.debug("call async_select_option %s, %s", option, self._disinfection_cabinet)
+        self._selected_option = option
+        self._attr_current_option = option
+        self.async_write_ha_state()
+        # 短时间内连续切换选项时只发送最后一次选择，每次选择都重新计时
+        self._async_cancel_send()
+        self._cancel_send = async_call_later(self.hass, SELECT_DEBOUNCE_COOLDOWN, self._async_send_selected_option)
+
+    @callback
+    def _async_cancel_send(self) -> None:
+        """
+        取消尚未到期的发送
+        """
+        if self._cancel_send is not None:
+            self._cancel_send()
+            self._cancel_send = None
+
+    async def _async_send_selected_option(self, _now=None) -> None:
+        """
+        发送防抖窗口内最后一次选择：off 关闭对应开关，其他选项设置时长并打开对应开关
+        发送期间的新选择重新计时，到期后作为下一条命令发送，设备的命令队列保证按选择顺序发送
+        """
+        self._cancel_send = None
+        option, self._selected_option = self._selected_option, None
+        if option is None:
+            return
+        if option == OPTION_OFF:
+            command_data = {self._switch_function.function_on_server: False}
+        else:
+            command_data = {
+                self._bololo_disinfection_cabinet_function.function_on_server: int(option),
+                self._switch_function.function_on_server: True,
+            }
+        _LOGGER.debug("call _async_send_selected_option , command_data : %s", command_data)
+        try:
+            await self._disinfection_cabinet.async_control(command_data)
+        except HomeAssistantError as err:
+            _LOGGER.error("call _async_send_selected_option , select %s failed : %s", option, err)
+            self._update_from_device_status()
+            self.async_write_ha_state()
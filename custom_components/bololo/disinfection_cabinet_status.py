@@ -2,13 +2,90 @@
 """
 消毒柜状态
 """
+from __future__ import annotations
+
 from typing import Any
 
+from .disinfection_cabinet_function import BololoDisinfectionCabinetFunction
+
+# 状态字段表：已知字段按固定顺序存放在元组中，状态对象不再为每个字段建实例属性
+STATUS_FIELDS = (
+    "yogurt_mode_time",
+    "clean_mode_time",
+    "temp_mode",
+    "disinfection_time",
+    "disinfection_switch",
+    "custom_atmosphere_lights",
+    "storage_switch",
+    "dry_time",
+    "custom_total_time",
+    "custom_total_remain_time",
+    "night_mode",
+    "dry_switch",
+    "auto_switch",
+    "error",
+    "custom_dis_remain_time",
+    "switch",
+    "filter_life",
+    "work_remain_time",
+    "custom_dis_time",
+    "auto_time",
+    "dry_time_lowtemp",
+    "Data_Rev1",
+    "status_time",
+    "Data_Rev3",
+    "Data_Rev2",
+    "Data_Rev5",
+    "Data_Rev4",
+    "custom_dry_time",
+    "custom_dry",
+    "custom_anion",
+    "baby_mode_time",
+    "night_mode_brightness",
+    "custom_storage_switch",
+    "auto_time_lowtemp",
+    "work_mode",
+    "custom_mute",
+    "fruit_mode_time",
+    "storage_time",
+    "anion",
+    "custom_night",
+    "custom_dry_remain_time",
+    "scene_mode_switch",
+    "warm_storage_time",
+    "custom_mode",
+    "custom_night_light",
+    "custom_storage_time",
+    "custom_dis",
+    "status",
+)
+_FIELD_INDEX = {field: index for index, field in enumerate(STATUS_FIELDS)}
+_FUNCTION_INDEX = {
+    function: _FIELD_INDEX[function.function_on_server] for function in BololoDisinfectionCabinetFunction
+}
+_WORK_REMAIN_TIME = _FIELD_INDEX["work_remain_time"]
+
+
+class _Missing:
+    """服务端未返回的字段"""
+
+    __slots__ = ()
+
+    def __bool__(self) -> bool:
+        return False
+
+    def __repr__(self) -> str:
+        return "<missing>"
+
+
+_MISSING = _Missing()
+
 
 class BololoDisinfectionCabinetStatus:
-    # pylint: disable=too-many-instance-attributes
-    # pylint: disable=too-few-public-methods
     """
+    消毒柜状态快照，创建后不再修改，字段变化时生成新的快照
+    已知字段按 STATUS_FIELDS 存放，服务端新增的未知字段原样保存在 extra 中
+
         "yogurt_mode_time": 8,
 		"clean_mode_time": 5,
 		"temp_mode": 1,
@@ -59,52 +136,109 @@ class BololoDisinfectionCabinetStatus:
 		"status": 1
     """
 
+    __slots__ = ("_values", "_extra")
+
     def __init__(self, status_info: dict[str, Any]):
-        self._yogurt_mode_time = status_info.get("yogurt_mode_time")
-        self._clean_mode_time = status_info.get("clean_mode_time")
-        self._temp_mode = status_info.get("temp_mode")
-        self._disinfection_time = status_info.get("disinfection_time")
-        self._disinfection_switch = status_info.get("disinfection_switch")
-        self._custom_atmosphere_lights = status_info.get("custom_atmosphere_lights")
-        self._storage_switch = status_info.get("storage_switch")
-        self._dry_time = status_info.get("dry_time")
-        self._custom_total_time = status_info.get("custom_total_time")
-        self._custom_total_remain_time = status_info.get("custom_total_remain_time")
-        self._night_mode = status_info.get("night_mode")
-        self._dry_switch = status_info.get("dry_switch")
-        self._auto_switch = status_info.get("auto_switch")
-        self._error = status_info.get("error")
-        self._custom_dis_remain_time = status_info.get("custom_dis_remain_time")
-        self._switch = status_info.get("switch")
-        self._filter_life = status_info.get("filter_life")
-        self._work_remain_time = status_info.get("work_remain_time")
-        self._custom_dis_time = status_info.get("custom_dis_time")
-        self._auto_time = status_info.get("auto_time")
-        self._dry_time_lowtemp = status_info.get("dry_time_lowtemp")
-        self._data_rev1 = status_info.get("Data_Rev1")
-        self._status_time = status_info.get("status_time")
-        self._data_rev3 = status_info.get("Data_Rev3")
-        self._data_rev2 = status_info.get("Data_Rev2")
-        self._data_rev5 = status_info.get("Data_Rev5")
-        self._data_rev4 = status_info.get("Data_Rev4")
-        self._custom_dry_time = status_info.get("custom_dry_time")
-        self._custom_dry = status_info.get("custom_dry")
-        self._custom_anion = status_info.get("custom_anion")
-        self._baby_mode_time = status_info.get("baby_mode_time")
-        self._night_mode_brightness = status_info.get("night_mode_brightness")
-        self._custom_storage_switch = status_info.get("custom_storage_switch")
-        self._auto_time_lowtemp = status_info.get("auto_time_lowtemp")
-        self._work_mode = status_info.get("work_mode")
-        self._custom_mute = status_info.get("custom_mute")
-        self._fruit_mode_time = status_info.get("fruit_mode_time")
-        self._storage_time = status_info.get("storage_time")
-        self._anion = status_info.get("anion")
-        self._custom_night = status_info.get("custom_night")
-        self._custom_dry_remain_time = status_info.get("custom_dry_remain_time")
-        self._scene_mode_switch = status_info.get("scene_mode_switch")
-        self._warm_storage_time = status_info.get("warm_storage_time")
-        self._custom_mode = status_info.get("custom_mode")
-        self._custom_night_light = status_info.get("custom_night_light")
-        self._custom_storage_time = status_info.get("custom_storage_time")
-        self._custom_dis = status_info.get("custom_dis")
-        self._status = status_info.get("status")
+        self._values = tuple(status_info.get(field, _MISSING) for field in STATUS_FIELDS)
+        extra = {field: value for field, value in status_info.items() if field not in _FIELD_INDEX}
+        self._extra = extra or None
+
+    @classmethod
+    def _from_values(cls, values: tuple, extra: dict[str, Any] | None) -> BololoDisinfectionCabinetStatus:
+        # pylint: disable=protected-access
+        device_status = cls.__new__(cls)
+        device_status._values = values
+        device_status._extra = extra
+        return device_status
+
+    def get(self, function: BololoDisinfectionCabinetFunction) -> Any:
+        """
+        返回功能对应字段的值，服务端未返回时为 None
+        """
+        value = self._values[_FUNCTION_INDEX[function]]
+        return None if value is _MISSING else value
+
+    def get_field(self, field: str) -> Any:
+        """
+        按服务端字段名返回值，包括不在字段表中的字段，不存在时为 None
+        """
+        index = _FIELD_INDEX.get(field)
+        if index is None:
+            return self._extra.get(field) if self._extra is not None else None
+        value = self._values[index]
+        return None if value is _MISSING else value
+
+    @property
+    def status_info(self) -> dict[str, Any]:
+        """
+        服务端返回的原始状态字段
+        """
+        status_info = {field: value for field, value in zip(STATUS_FIELDS, self._values) if value is not _MISSING}
+        if self._extra is not None:
+            status_info.update(self._extra)
+        return status_info
+
+    def changed_fields(self, previous: BololoDisinfectionCabinetStatus) -> set[str]:
+        """
+        与上一个状态对比，返回值发生变化的字段名
+        """
+        # pylint: disable=protected-access
+        if self._values == previous._values and self._extra == previous._extra:
+            return set()
+        changed = {
+            field
+            for field, value, previous_value in zip(STATUS_FIELDS, self._values, previous._values)
+            if value != previous_value
+        }
+        if self._extra != previous._extra:
+            extra, previous_extra = self._extra or {}, previous._extra or {}
+            changed.update(
+                field for field in extra.keys() | previous_extra.keys()
+                if extra.get(field, _MISSING) != previous_extra.get(field, _MISSING)
+            )
+        return changed
+
+    def merge(self, status_info: dict[str, Any]) -> BololoDisinfectionCabinetStatus:
+        """
+        合并部分字段（如推送消息、控制结果），返回新的状态对象
+        """
+        values = list(self._values)
+        extra = dict(self._extra) if self._extra is not None else {}
+        for field, value in status_info.items():
+            index = _FIELD_INDEX.get(field)
+            if index is None:
+                extra[field] = value
+            else:
+                values[index] = value
+        return self._from_values(tuple(values), extra or None)
+
+    @property
+    def work_remain_time(self) -> int:
+        """
+        当前工作周期剩余时长（分钟）
+        """
+        value = self._values[_WORK_REMAIN_TIME]
+        return 0 if value is _MISSING else value or 0
+
+    @property
+    def is_working(self) -> bool:
+        """
+        消毒或烘干周期是否正在运行
+        """
+        return bool(self.get_field("switch")) and (
+                bool(self.get_field("disinfection_switch")) or bool(self.get_field("dry_switch"))
+                or self.work_remain_time > 0
+        )
+
+    @property
+    def work_state(self) -> tuple:
+        """
+        工作状态摘要，用于判断两次状态之间工作状态是否发生变化
+        """
+        return (
+            self.get_field("switch"),
+            self.get_field("disinfection_switch"),
+            self.get_field("dry_switch"),
+            self.get_field("status"),
+            self.work_remain_time > 0,
+        )
@@ -9,11 +9,11 @@ import logging
 
 from homeassistant.components.switch import SwitchEntity
 from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import STATE_ON
+from homeassistant.core import State
 from homeassistant.helpers.device_registry import DeviceInfo
-from homeassistant.helpers.translation import async_get_translations
 
 from .bololo_entity import BololoEntity
-from .const import (DOMAIN)
 from .disinfection_cabinet_function import BololoDisinfectionCabinetFunction
 
 # pylint: disable=line-too-long
@@ -21,7 +21,7 @@ from .disinfection_cabinet_function import BololoDisinfectionCabinetFunction
 _LOGGER = logging.getLogger(__name__)
 
 if TYPE_CHECKING:
-    from . import BololoDisinfectionCabinet
+    from .coordinator import BololoDataUpdateCoordinator
 
 
 class DisinfectionCabinetSwitch(SwitchEntity, BololoEntity):
@@ -33,27 +33,19 @@ class DisinfectionCabinetSwitch(SwitchEntity, BololoEntity):
     def __init__(
             self,
             config_entry: ConfigEntry,
+            coordinator: BololoDataUpdateCoordinator,
             bololo_disinfection_cabinet_function: BololoDisinfectionCabinetFunction,
     ) -> None:
         SwitchEntity.__init__(self)
-        BololoEntity.__init__(self, config_entry, bololo_disinfection_cabinet_function)
+        BololoEntity.__init__(self, config_entry, coordinator, bololo_disinfection_cabinet_function)
         self._disinfection_cabinet = None
         self._bololo_disinfection_cabinet_function = bololo_disinfection_cabinet_function
         self._config_entry: ConfigEntry = config_entry
         self._attr_unique_id = None
-        self._attr_name = self._bololo_disinfection_cabinet_function.function
         self._attr_is_on = False
-        self.entity_id = f"{DOMAIN}.disinfection_cabinet_{self._bololo_disinfection_cabinet_function.function_on_server}"
-        _LOGGER.debug("call init disinfection cabinet switch, %s", self.entity_id)
+        _LOGGER.debug("call init disinfection cabinet switch, %s", self._bololo_disinfection_cabinet_function)
         self._attr_icon = self._bololo_disinfection_cabinet_function.icon
 
-    def set_disinfection_cabinet(self, disinfection_cabinet: BololoDisinfectionCabinet):
-        """
-        设置 消毒柜对象引用
-        """
-        self._disinfection_cabinet = disinfection_cabinet
-        self._attr_unique_id = f"{self._disinfection_cabinet.mac.lower()}_{self._bololo_disinfection_cabinet_function.function_on_server}"
-
     @property
     def device_info(self) -> DeviceInfo:
         """返回设备信息"""
@@ -74,24 +66,28 @@ class DisinfectionCabinetSwitch(SwitchEntity, BololoEntity):
         _LOGGER.debug("call is_on")
         return self._attr_is_on
 
-    async def async_update(self):
+    def _update_from_device_status(self) -> None:
         """
-        更新设备信息（基础信息/状态信息），由hass调用
+        根据设备最近一次状态更新开关状态
         """
-        device_status = await self._disinfection_cabinet.device_status
-        _LOGGER.debug("call async_update ,switch function %s , device_status : %s",
-                      self._bololo_disinfection_cabinet_function,
-                      device_status.__dict__)
-        is_on = getattr(device_status, f"_{self._bololo_disinfection_cabinet_function.function_on_server}")
+        device_status = self._disinfection_cabinet.last_device_status
+        if device_status is None:
+            return
+        is_on = device_status.get(self._bololo_disinfection_cabinet_function)
         if is_on != self._attr_is_on:
-            _LOGGER.debug("call async_update , update %s status for config_entity : %s , is_on %s -> %s",
+            _LOGGER.debug("call _update_from_device_status , update %s status for config_entity : %s , is_on %s -> %s",
                           self._bololo_disinfection_cabinet_function,
                           self._config_entry,
                           self._attr_is_on,
                           is_on
                           )
             self._attr_is_on = is_on
-            self.async_write_ha_state()
+
+    def _restore_from_last_state(self, last_state: State) -> None:
+        """
+        使用重启前的最后状态初始化开关状态
+        """
+        self._attr_is_on = last_state.state == STATE_ON
 
     async def async_turn_on(self, **kwargs: Any) -> None:
         """Turn the entity on."""
@@ -99,6 +95,7 @@ class DisinfectionCabinetSwitch(SwitchEntity, BololoEntity):
             self._bololo_disinfection_cabinet_function.function_on_server, True
         )
         self._attr_is_on = True
+        self.async_write_ha_state()
 
     def turn_on(self, **kwargs: Any) -> None:
         """Turn the entity on."""
@@ -118,3 +115,4 @@ class DisinfectionCabinetSwitch(SwitchEntity, BololoEntity):
             self._bololo_disinfection_cabinet_function.function_on_server, False
         )
         self._attr_is_on = False
+        self.async_write_ha_state()
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""
+批量刷新设备状态
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+import time
+from typing import TYPE_CHECKING, Any
+
+from .api_client import BololoApiClientError
+
+_LOGGER = logging.getLogger(__name__)
+
+if TYPE_CHECKING:
+    from .device import BololoDevice
+
+
+class BololoFleetRefreshResult:
+    """
+    批量刷新结果：成功的设备状态、失败的设备异常、每台设备的请求耗时
+    """
+
+    def __init__(self):
+        self.device_status: dict[str, Any] = {}
+        self.errors: dict[str, Exception] = {}
+        self.latencies: dict[str, float] = {}
+        self.elapsed: float = 0.0
+
+    @property
+    def max_latency(self) -> float:
+        """
+        单台设备的最大耗时（秒）
+        """
+        return max(self.latencies.values(), default=0.0)
+
+    @property
+    def total_latency(self) -> float:
+        """
+        所有设备耗时之和（秒），即串行刷新所需时间
+        """
+        return sum(self.latencies.values())
+
+
+async def async_refresh_fleet_status(
+        bololo_devices: list[BololoDevice],
+        max_concurrency: int,
+        start_jitter: float = 0,
+) -> BololoFleetRefreshResult:
+    """
+    以有限并发刷新所有设备状态，单台设备失败不影响其他设备
+    start_jitter 大于 0 时每台设备随机延迟 [0, start_jitter) 秒后开始，用于打散重启后的首次刷新
+    """
+    result = BololoFleetRefreshResult()
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+    async def _async_refresh(bololo_device: BololoDevice) -> None:
+        if start_jitter > 0:
+            await asyncio.sleep(random.uniform(0, start_jitter))
+        async with semaphore:
+            started_at = time.monotonic()
+            try:
+                result.device_status[bololo_device.did] = await bololo_device.async_refresh_device_status()
+            except (BololoApiClientError, TimeoutError) as err:
+                result.errors[bololo_device.did] = err
+            finally:
+                result.latencies[bololo_device.did] = time.monotonic() - started_at
+
+    started_at = time.monotonic()
+    await asyncio.gather(*(_async_refresh(bololo_device) for bololo_device in bololo_devices))
+    result.elapsed = time.monotonic() - started_at
+    _LOGGER.debug(
+        "call async_refresh_fleet_status , %s device(s) , %s failed , elapsed %.3fs , max latency %.3fs , "
+        "total latency %.3fs , latencies : %s",
+        len(bololo_devices), len(result.errors), result.elapsed, result.max_latency, result.total_latency,
+        result.latencies,
+    )
+    return result
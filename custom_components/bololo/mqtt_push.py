@@ -0,0 +1,215 @@
+# -*- coding: utf-8 -*-
+"""
+MQTT 状态推送
+"""
+from __future__ import annotations
+
+import json
+import logging
+import uuid
+from typing import TYPE_CHECKING
+
+import paho.mqtt.client as mqtt
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, callback
+
+from .const import FIELD_NAME_MQTT_BROKER, FIELD_NAME_TOKEN, MQTT_KEEPALIVE, MQTT_STATUS_TOPIC_TEMPLATE
+
+_LOGGER = logging.getLogger(__name__)
+
+if TYPE_CHECKING:
+    from .coordinator import BololoDataUpdateCoordinator
+    from .disinfection_cabinet import BololoDisinfectionCabinet
+
+
+class BololoMqttPushClient:
+    # pylint: disable=too-many-instance-attributes
+    """
+    订阅 Bololo MQTT 集群上的设备状态推送，收到后直接更新设备状态快照
+    paho 网络循环运行在独立线程中，消息回调切回 HA 事件循环处理
+    """
+
+    # pylint: disable=too-many-arguments,too-many-positional-arguments
+    def __init__(
+            self,
+            hass: HomeAssistant,
+            coordinator: BololoDataUpdateCoordinator,
+            host: str,
+            port: int,
+            username: str | None = None,
+            password: str | None = None,
+    ):
+        self._hass = hass
+        self._coordinator = coordinator
+        self._host = host
+        self._port = port
+        self._devices: dict[str, BololoDisinfectionCabinet] = {}
+        self._connected = False
+        self._stopped = False
+        self._client = mqtt.Client(
+            mqtt.CallbackAPIVersion.VERSION2,
+            client_id=f"ha_bololo_{uuid.uuid4().hex[:12]}",
+        )
+        if username is not None:
+            self._client.username_pw_set(username, password)
+        self._client.on_connect = self._on_connect
+        self._client.on_disconnect = self._on_disconnect
+        self._client.on_message = self._on_message
+
+    @property
+    def connected(self) -> bool:
+        """
+        是否已连接到 MQTT 集群
+        """
+        return self._connected
+
+    def update_credentials(self, username: str, password: str | None) -> None:
+        """
+        token 刷新后更新认证信息，当前连接不受影响，paho 之后重连时使用新的认证信息
+        """
+        _LOGGER.debug("call update_credentials , mqtt %s:%s credentials updated", self._host, self._port)
+        self._client.username_pw_set(username, password)
+
+    def add_device(self, bololo_device: BololoDisinfectionCabinet) -> None:
+        """
+        订阅设备的状态推送
+        """
+        self._devices[bololo_device.did] = bololo_device
+        if self._connected:
+            self._client.subscribe(MQTT_STATUS_TOPIC_TEMPLATE.format(did=bololo_device.did))
+            bololo_device.push_connected = True
+            self._coordinator.async_update_push_coverage()
+
+    def remove_device(self, did: str) -> None:
+        """
+        取消订阅设备的状态推送
+        """
+        bololo_device = self._devices.pop(did, None)
+        if bololo_device is not None and self._connected:
+            self._client.unsubscribe(MQTT_STATUS_TOPIC_TEMPLATE.format(did=did))
+            bololo_device.push_connected = False
+
+    def start(self) -> None:
+        """
+        开始连接，连接和重连都在 paho 的网络线程中完成，不阻塞事件循环
+        """
+        _LOGGER.debug("call start , connect mqtt %s:%s", self._host, self._port)
+        self._client.connect_async(self._host, self._port, MQTT_KEEPALIVE)
+        self._client.loop_start()
+
+    async def async_stop(self) -> None:
+        """
+        断开连接并停止网络线程
+        """
+        _LOGGER.debug("call async_stop , disconnect mqtt %s:%s", self._host, self._port)
+        self._stopped = True
+        self._client.disconnect()
+        await self._hass.async_add_executor_job(self._client.loop_stop)
+        self._connected = False
+        for bololo_device in self._devices.values():
+            bololo_device.push_connected = False
+
+    # pylint: disable=unused-argument,too-many-arguments,too-many-positional-arguments
+    def _on_connect(self, client, userdata, flags, reason_code, properties) -> None:
+        """paho 线程：连接结果"""
+        if reason_code.is_failure:
+            _LOGGER.warning("call _on_connect , connect mqtt %s:%s failed : %s", self._host, self._port, reason_code)
+            return
+        _LOGGER.debug("call _on_connect , mqtt %s:%s connected", self._host, self._port)
+        self._hass.loop.call_soon_threadsafe(self._set_connected, True)
+
+    # pylint: disable=unused-argument,too-many-arguments,too-many-positional-arguments
+    def _on_disconnect(self, client, userdata, flags, reason_code, properties) -> None:
+        """paho 线程：连接断开，paho 会自动重连"""
+        _LOGGER.debug("call _on_disconnect , mqtt %s:%s disconnected : %s", self._host, self._port, reason_code)
+        self._hass.loop.call_soon_threadsafe(self._set_connected, False)
+
+    # pylint: disable=unused-argument
+    def _on_message(self, client, userdata, message) -> None:
+        """paho 线程：收到推送消息"""
+        self._hass.loop.call_soon_threadsafe(self._handle_message, message.topic, message.payload)
+
+    @callback
+    def _set_connected(self, connected: bool) -> None:
+        if self._stopped or connected == self._connected:
+            return
+        self._connected = connected
+        if connected:
+            # 在事件循环中订阅，与 add_device/remove_device 串行，连接期间新增的设备不会漏订阅
+            for did in self._devices:
+                self._client.subscribe(MQTT_STATUS_TOPIC_TEMPLATE.format(did=did))
+        # 只有本集群的设备随连接状态切换轮询方式，其他集群和没有推送的设备不受影响
+        for bololo_device in self._devices.values():
+            bololo_device.push_connected = connected
+        self._coordinator.async_update_push_coverage()
+
+    @callback
+    def _handle_message(self, topic: str, payload: bytes) -> None:
+        """
+        处理设备状态推送
+        """
+        did = topic.rsplit("/", 1)[-1]
+        bololo_device = self._devices.get(did)
+        if bololo_device is None:
+            _LOGGER.debug("call _handle_message , ignore message for unknown topic : %s", topic)
+            return
+        try:
+            message = json.loads(payload)
+        except ValueError as err:
+            _LOGGER.warning("call _handle_message , invalid payload on %s : %s", topic, err)
+            return
+        if not isinstance(message, dict):
+            return
+        status_info = message.get("data") if isinstance(message.get("data"), dict) else message
+        _LOGGER.debug("call _handle_message , device %s status pushed : %s", did, status_info)
+        bololo_device.apply_pushed_device_status(status_info)
+        self._coordinator.async_set_device_status(bololo_device)
+
+
+def get_mqtt_broker(config_entry: ConfigEntry, bololo_device: BololoDisinfectionCabinet) -> tuple[str, int] | None:
+    """
+    返回设备使用的 MQTT 集群地址，设备没有推送信息时返回 None
+    """
+    mqtt_broker = config_entry.options.get(FIELD_NAME_MQTT_BROKER)
+    if mqtt_broker:
+        # 指定的 broker（如本地测试 broker）优先于云端下发的集群地址
+        host, _, port = mqtt_broker.partition(":")
+        return host, int(port or 1883)
+    if bololo_device.mqtt_info is not None and bololo_device.mqtt_info.get("cluster_address"):
+        return bololo_device.mqtt_info["cluster_address"], bololo_device.mqtt_info["cluster_mqtt_port"]
+    return None
+
+
+@callback
+def add_push_device(
+        hass: HomeAssistant,
+        config_entry: ConfigEntry,
+        coordinator: BololoDataUpdateCoordinator,
+        push_clients: dict[tuple[str, int], BololoMqttPushClient],
+        bololo_device: BololoDisinfectionCabinet,
+) -> None:
+    """
+    把设备加入所属 MQTT 集群的推送连接，该集群还没有连接时新建并启动
+    """
+    broker = get_mqtt_broker(config_entry, bololo_device)
+    if broker is None:
+        _LOGGER.debug("call add_push_device , device %s has no mqtt info", bololo_device.did)
+        return
+    push_client = push_clients.get(broker)
+    if push_client is not None:
+        push_client.add_device(bololo_device)
+        return
+    token = config_entry.data.get(FIELD_NAME_TOKEN)
+    push_client = BololoMqttPushClient(
+        hass,
+        coordinator,
+        host=broker[0],
+        port=broker[1],
+        username=str(token.get("uid")),
+        password=token.get("userToken"),
+    )
+    push_client.add_device(bololo_device)
+    push_client.start()
+    config_entry.async_on_unload(push_client.async_stop)
+    push_clients[broker] = push_client
+    _LOGGER.debug("call add_push_device , mqtt broker %s:%s started", *broker)
@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+"""
+令牌桶限流
+"""
+from __future__ import annotations
+
+import asyncio
+import time
+
+
+class BololoTokenBucket:
+    """
+    令牌桶：以 rate 个/秒的速度补充令牌，最多积攒 capacity 个，每个请求消耗一个令牌
+    令牌不足时按到达顺序排队等待
+    """
+
+    def __init__(self, rate: float, capacity: int):
+        self._rate = rate
+        self._capacity = capacity
+        self._tokens = float(capacity)
+        self._updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self._capacity, self._tokens + (now - self._updated_at) * self._rate)
+        self._updated_at = now
+
+    async def async_acquire(self) -> float:
+        """
+        获取一个令牌，返回排队等待的秒数
+        """
+        started_at = time.monotonic()
+        async with self._lock:
+            self._refill()
+            while self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self._rate)
+                self._refill()
+            self._tokens -= 1
+        return time.monotonic() - started_at
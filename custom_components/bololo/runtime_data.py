@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+"""
+配置条目运行时数据
+"""
+from __future__ import annotations
+
+from homeassistant.config_entries import ConfigEntry
+
+from .api_client import BololoApiClient
+from .coordinator import BololoDataUpdateCoordinator
+from .device import BololoDevice
+from .device_cache import BololoDeviceCache
+from .discovery import BololoDeviceDiscovery
+from .token_manager import BololoTokenManager
+
+
+class BololoRuntimeData:
+    """
+    每个配置条目（账号）独立的运行时对象，保存在 entry.runtime_data 中，多个账号互不影响
+    """
+
+    # pylint: disable=too-many-arguments,too-many-positional-arguments
+    def __init__(
+            self,
+            api_client: BololoApiClient,
+            token_manager: BololoTokenManager,
+            device_cache: BololoDeviceCache,
+            coordinator: BololoDataUpdateCoordinator,
+            discovery: BololoDeviceDiscovery,
+            push_options: tuple,
+    ):
+        self.api_client = api_client
+        self.token_manager = token_manager
+        self.device_cache = device_cache
+        self.coordinator = coordinator
+        self.discovery = discovery
+        self.push_options = push_options
+
+    @property
+    def devices(self) -> list[BololoDevice]:
+        """
+        返回该账号下的设备
+        """
+        return self.discovery.devices
+
+
+BololoConfigEntry = ConfigEntry[BololoRuntimeData]
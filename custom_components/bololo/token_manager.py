@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+"""
+token 管理
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+
+from .api_client import BololoApiClient, BololoApiClientAuthError, BololoApiClientError
+from .const import DOMAIN, FIELD_NAME_TOKEN, TOKEN_REFRESH_MARGIN, TOKEN_REFRESH_RETRY_INTERVAL
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class BololoTokenManager:
+    """
+    管理账号 token：
+    在 expiredAt 之前后台提前刷新；请求遇到认证失败时，所有并发请求等待同一次刷新后重试一次
+    """
+
+    def __init__(self, hass: HomeAssistant, config_entry: ConfigEntry, bololo_api_client: BololoApiClient):
+        self._hass = hass
+        self._config_entry = config_entry
+        self._api_client = bololo_api_client
+        self._refresh_task: asyncio.Task | None = None
+        self._cancel_scheduled_refresh: CALLBACK_TYPE | None = None
+        self._token_listeners: list[Callable[[dict[str, Any]], None]] = []
+
+    @property
+    def token(self) -> dict[str, Any]:
+        """
+        返回当前 token 信息
+        """
+        return self._config_entry.data.get(FIELD_NAME_TOKEN) or {}
+
+    @property
+    def user_token(self) -> str | None:
+        """
+        返回当前 userToken
+        """
+        return self.token.get("userToken")
+
+    @callback
+    def async_add_token_listener(self, token_listener: Callable[[dict[str, Any]], None]) -> CALLBACK_TYPE:
+        """
+        token 刷新后以新的 token 信息调用 token_listener，返回取消监听的回调
+        """
+        self._token_listeners.append(token_listener)
+
+        @callback
+        def _remove_token_listener() -> None:
+            self._token_listeners.remove(token_listener)
+
+        return _remove_token_listener
+
+    async def async_call(self, request: Callable[..., Awaitable[Any]], **kwargs) -> Any:
+        """
+        以当前 userToken 调用 request(auth_token=..., **kwargs)，认证失败时等待刷新后重试一次
+        """
+        auth_token = self.user_token
+        try:
+            return await request(auth_token=auth_token, **kwargs)
+        except BololoApiClientAuthError:
+            _LOGGER.debug("call async_call , auth failed , wait for token refresh")
+            await self.async_refresh(auth_token)
+            return await request(auth_token=self.user_token, **kwargs)
+
+    async def async_refresh(self, failed_token: str | None = None) -> None:
+        """
+        刷新 token，同一时刻只有一次刷新请求，其余调用方等待同一结果
+        failed_token 已不是当前 token 时说明已被其他调用方刷新过，直接返回
+        """
+        if failed_token is not None and failed_token != self.user_token:
+            return
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = self._config_entry.async_create_background_task(
+                self._hass, self._async_refresh_token(), f"{DOMAIN}_token_refresh"
+            )
+        await asyncio.shield(self._refresh_task)
+
+    async def _async_refresh_token(self) -> None:
+        token = self.token
+        refresh_token = token.get("refreshToken")
+        if not refresh_token:
+            raise BololoApiClientAuthError("token expired and no refreshToken available")
+        _LOGGER.debug("call _async_refresh_token , refresh token expired at %s", token.get("expiredAt"))
+        new_token = await self._api_client.refresh_token(refresh_token)
+        self._hass.config_entries.async_update_entry(
+            self._config_entry,
+            data={**self._config_entry.data, FIELD_NAME_TOKEN: {**token, **(new_token or {})}},
+        )
+        _LOGGER.info("bololo token refreshed , expired at %s", self.token.get("expiredAt"))
+        for token_listener in list(self._token_listeners):
+            token_listener(self.token)
+        self._schedule_refresh()
+
+    @callback
+    def start(self) -> None:
+        """
+        开始按 expiredAt 提前刷新 token
+        """
+        self._schedule_refresh()
+
+    @callback
+    def stop(self) -> None:
+        """
+        停止定时刷新
+        """
+        if self._cancel_scheduled_refresh is not None:
+            self._cancel_scheduled_refresh()
+            self._cancel_scheduled_refresh = None
+
+    @callback
+    def _schedule_refresh(self, delay: float | None = None) -> None:
+        self.stop()
+        if delay is None:
+            expired_at = self.token.get("expiredAt")
+            if not expired_at:
+                return
+            delay = max(0.0, expired_at - TOKEN_REFRESH_MARGIN - time.time())
+        _LOGGER.debug("call _schedule_refresh , refresh token in %.0fs", delay)
+        self._cancel_scheduled_refresh = async_call_later(self._hass, delay, self._async_handle_scheduled_refresh)
+
+    async def _async_handle_scheduled_refresh(self, _now) -> None:
+        self._cancel_scheduled_refresh = None
+        try:
+            await self.async_refresh()
+        except BololoApiClientError as err:
+            _LOGGER.warning("call _async_handle_scheduled_refresh , refresh token failed : %s", err)
+            self._schedule_refresh(TOKEN_REFRESH_RETRY_INTERVAL)
@@ -0,0 +1,113 @@
+"""
+测试公共的 HA 替身和设备构造
+"""
+import asyncio
+import os
+
+import pytest
+
+from custom_components.bololo.const import FIELD_NAME_TOKEN
+from custom_components.bololo.coordinator import BololoDataUpdateCoordinator
+from custom_components.bololo.device_cache import BololoDeviceCache
+from custom_components.bololo.device_type import BololoDeviceType
+from custom_components.bololo.discovery import BololoDeviceDiscovery
+from custom_components.bololo.token_manager import BololoTokenManager
+
+
+# 耗时断言受机器负载影响，只在设置 BOLOLO_BENCHMARK=1 时运行
+benchmark = pytest.mark.skipif(
+    os.environ.get("BOLOLO_BENCHMARK") != "1", reason="set BOLOLO_BENCHMARK=1 to run timing benchmarks"
+)
+
+
+class FakeHass:
+    """只提供事件循环和执行器，没有 config_entries，设备发现不能再转发平台设置"""
+
+    def __init__(self):
+        self.loop = asyncio.get_running_loop()
+
+    def async_add_executor_job(self, target, *args):
+        return self.loop.run_in_executor(None, target, *args)
+
+
+class FakeConfigEntry:
+    """配置条目：后台任务直接在当前事件循环中创建"""
+
+    def __init__(self, entry_id: str):
+        self.entry_id = entry_id
+        self.data = {FIELD_NAME_TOKEN: {"userToken": f"token_{entry_id}"}}
+        self.options = {}
+
+    @staticmethod
+    def async_create_background_task(_hass, target, name):
+        return asyncio.get_running_loop().create_task(target, name=name)
+
+    def async_on_unload(self, _func) -> None:
+        """卸载回调由测试自行处理"""
+
+
+IDLE_STATUS_INFO = {"switch": True, "disinfection_switch": False, "dry_switch": False, "work_remain_time": 0}
+
+
+class FakeApiClient:
+    """返回指定的设备列表，设备状态可按 mac 指定，默认空闲"""
+
+    def __init__(self, device_list: list[dict]):
+        self.device_list = device_list
+        self.device_status: dict[str, dict] = {}
+        self.status_requests: list[str] = []
+
+    async def list_device(self, auth_token: str) -> list[dict]:
+        assert auth_token
+        return list(self.device_list)
+
+    async def get_device_status(self, auth_token: str, product_key: str, mac: str) -> dict:
+        assert auth_token and product_key
+        self.status_requests.append(mac)
+        return self.device_status.get(mac, IDLE_STATUS_INFO)
+
+    async def control_device(self, auth_token: str, product_key: str, mac: str, command_data: dict) -> None:
+        assert auth_token and product_key
+        self.device_status[mac] = {**self.device_status.get(mac, IDLE_STATUS_INFO), **command_data}
+
+
+def device_item(index: int, prefix: str = "") -> dict:
+    """云端设备列表中的一台消毒柜"""
+    return {
+        "did": f"{prefix}did{index}",
+        "productKey": BololoDeviceType.DISINFECTION_CABINET.product_key,
+        "mac": f"{prefix}AABBCC{index:06X}",
+        "name": f"消毒柜 {index}",
+    }
+
+
+async def create_discovery(hass: FakeHass, entry_id: str, device_list: list[dict]) -> BololoDeviceDiscovery:
+    """按 async_setup_entry 的方式为一个配置条目创建协调器和设备发现"""
+    config_entry = FakeConfigEntry(entry_id)
+    api_client = FakeApiClient(device_list)
+    device_cache = BololoDeviceCache(hass, entry_id)
+    await device_cache.async_load()
+    coordinator = BololoDataUpdateCoordinator(hass, config_entry, device_cache)
+    discovery = BololoDeviceDiscovery(
+        hass, config_entry, device_cache, coordinator, api_client,
+        BololoTokenManager(hass, config_entry, api_client), coordinator.devices,
+    )
+    discovery.create_devices(device_list)
+    return discovery
+
+
+async def async_add_entities_to_hass(hass: FakeHass, discovery: BololoDeviceDiscovery) -> None:
+    """模拟平台添加所有设备的实体"""
+    for bololo_device in discovery.devices:
+        for entity in bololo_device.get_entities():
+            entity.hass = hass
+            await entity.async_added_to_hass()
+
+
+async def async_unload(discovery: BololoDeviceDiscovery) -> None:
+    """按 async_unload_entry 的顺序卸载：移除实体、停止协调器、释放设备"""
+    for bololo_device in discovery.devices:
+        for entity in bololo_device.get_entities():
+            await entity.async_remove()
+    await discovery._coordinator.async_shutdown()  # pylint: disable=protected-access
+    await discovery.async_shutdown()
@@ -0,0 +1,244 @@
+"""
+测试公共配置
+
+状态快照、命令队列、熔断、限流、自适应轮询、批量刷新等逻辑不依赖 Home Assistant 运行时。
+未安装 homeassistant 时，为集成导入的接口提供最小替身（协调器、实体基类、定时器、设备注册表、存储），
+并直接以 custom_components/bololo 目录注册包，跳过会加载 HA 各组件的 __init__.py
+"""
+import asyncio
+import enum
+import sys
+import types
+from pathlib import Path
+from typing import Generic, TypeVar
+
+try:
+    import homeassistant  # noqa: F401  # pylint: disable=unused-import
+except ImportError:
+    _T = TypeVar("_T")
+
+    def _stub_module(name: str, **attrs) -> types.ModuleType:
+        module = types.ModuleType(name)
+        module.__dict__.update(attrs)
+        sys.modules[name] = module
+        parent_name, _, child_name = name.rpartition(".")
+        if parent_name in sys.modules:
+            setattr(sys.modules[parent_name], child_name, module)
+        return module
+
+    class Platform(enum.StrEnum):
+        """homeassistant.const.Platform 替身"""
+        BUTTON = "button"
+        SELECT = "select"
+        SWITCH = "switch"
+
+    class State:
+        """homeassistant.core.State 替身"""
+
+        def __init__(self, entity_id: str, state: str):
+            self.entity_id = entity_id
+            self.state = state
+
+    class HomeAssistantError(Exception):
+        """homeassistant.exceptions.HomeAssistantError 替身"""
+
+    class ConfigEntry(Generic[_T]):
+        """homeassistant.config_entries.ConfigEntry 替身"""
+
+    class Entity:
+        """homeassistant.helpers.entity.Entity 替身，只记录移除回调，不写入状态机"""
+
+        hass = None
+        entity_id = None
+        _attr_unique_id = None
+
+        @property
+        def unique_id(self):
+            """实体唯一 ID"""
+            return self._attr_unique_id
+
+        def async_on_remove(self, func) -> None:
+            """登记移除实体时调用的回调"""
+            self.__dict__.setdefault("_on_remove", []).append(func)
+
+        def async_write_ha_state(self) -> None:
+            """不写入状态机"""
+
+        async def async_remove(self, *, force_remove: bool = False) -> None:
+            """调用登记的移除回调"""
+            while self.__dict__.get("_on_remove"):
+                self._on_remove.pop()()
+
+    class RestoreEntity(Entity):
+        """homeassistant.helpers.restore_state.RestoreEntity 替身，没有重启前的状态"""
+
+        async def async_added_to_hass(self) -> None:
+            """没有需要恢复的状态"""
+
+        async def async_get_last_state(self):
+            """没有重启前的状态"""
+            return None
+
+    class UpdateFailed(Exception):
+        """homeassistant.helpers.update_coordinator.UpdateFailed 替身"""
+
+    class DataUpdateCoordinator(Generic[_T]):
+        """
+        homeassistant.helpers.update_coordinator.DataUpdateCoordinator 替身：
+        与 HA 一致，async_set_updated_data 会重新安排定时刷新
+        """
+
+        # pylint: disable=too-many-arguments
+        def __init__(self, hass, logger, *, config_entry=None, name, update_interval=None, **_kwargs):
+            self.hass = hass
+            self.logger = logger
+            self.config_entry = config_entry
+            self.name = name
+            self.update_interval = update_interval
+            self.data = None
+            self.last_update_success = True
+            self._listeners: dict[int, object] = {}
+            self._last_listener_id = 0
+
+        def async_add_listener(self, update_callback, context=None):
+            """登记监听，返回取消登记的回调"""
+            self._last_listener_id += 1
+            listener_id = self._last_listener_id
+            self._listeners[listener_id] = update_callback
+            return lambda: self._listeners.pop(listener_id)
+
+        def async_update_listeners(self) -> None:
+            """通知所有监听"""
+            for update_callback in list(self._listeners.values()):
+                update_callback()
+
+        def async_set_updated_data(self, data) -> None:
+            """设置数据、重新安排定时刷新并通知监听"""
+            self.data = data
+            self._schedule_refresh()
+            self.async_update_listeners()
+
+        def _schedule_refresh(self) -> None:
+            """按 update_interval 安排下一次刷新"""
+
+        async def async_refresh(self) -> None:
+            """立即刷新"""
+            self.data = await self._async_update_data()
+            self.async_update_listeners()
+
+        async def async_request_refresh(self) -> None:
+            """请求刷新"""
+            await self.async_refresh()
+
+        async def async_shutdown(self) -> None:
+            """停止定时刷新"""
+
+        async def _async_update_data(self):
+            raise NotImplementedError
+
+    class CoordinatorEntity(Entity, Generic[_T]):
+        """homeassistant.helpers.update_coordinator.CoordinatorEntity 替身"""
+
+        def __init__(self, coordinator, context=None):
+            self.coordinator = coordinator
+            self.coordinator_context = context
+
+    class Store(Generic[_T]):
+        """homeassistant.helpers.storage.Store 替身，数据只保存在内存中"""
+
+        def __init__(self, hass, version, key):
+            self.key = key
+            self.data = None
+
+        async def async_load(self):
+            """读取数据"""
+            return self.data
+
+        def async_delay_save(self, data_func, delay=0) -> None:
+            """立即保存"""
+            self.data = data_func()
+
+        async def async_save(self, data) -> None:
+            """保存数据"""
+            self.data = data
+
+        async def async_remove(self) -> None:
+            """删除数据"""
+            self.data = None
+
+    class DeviceRegistry:
+        """homeassistant.helpers.device_registry.DeviceRegistry 替身"""
+
+        def __init__(self):
+            self.devices: dict[str, types.SimpleNamespace] = {}
+
+        def async_get_or_create(self, *, config_entry_id, identifiers, **kwargs):
+            """按 identifiers 创建或返回设备条目"""
+            device_entry = self.async_get_device(identifiers=identifiers)
+            if device_entry is None:
+                device_entry = types.SimpleNamespace(
+                    id=f"device_{len(self.devices)}", identifiers=identifiers, config_entries=set(), **kwargs
+                )
+                self.devices[device_entry.id] = device_entry
+            device_entry.config_entries.add(config_entry_id)
+            return device_entry
+
+        def async_get_device(self, *, identifiers):
+            """按 identifiers 查找设备条目"""
+            return next(
+                (device_entry for device_entry in self.devices.values() if device_entry.identifiers & identifiers),
+                None,
+            )
+
+        def async_update_device(self, device_id, *, remove_config_entry_id=None):
+            """从设备条目中移除配置条目，不再属于任何配置条目时删除"""
+            device_entry = self.devices[device_id]
+            device_entry.config_entries.discard(remove_config_entry_id)
+            if not device_entry.config_entries:
+                del self.devices[device_id]
+
+    def async_get_device_registry(hass) -> DeviceRegistry:
+        """每个 hass 一个设备注册表"""
+        if not hasattr(hass, "device_registry"):
+            hass.device_registry = DeviceRegistry()
+        return hass.device_registry
+
+    def async_call_later(hass, delay, action):
+        """homeassistant.helpers.event.async_call_later 替身，在 hass.loop 上延迟调用，返回取消回调"""
+        if hasattr(delay, "total_seconds"):
+            delay = delay.total_seconds()
+
+        def _run() -> None:
+            result = action(None)
+            if asyncio.iscoroutine(result):
+                hass.loop.create_task(result)
+
+        return hass.loop.call_later(delay, _run).cancel
+
+    _stub_module("homeassistant", __path__=[])
+    _stub_module("homeassistant.const", Platform=Platform, STATE_ON="on")
+    _stub_module("homeassistant.core", HomeAssistant=object, CALLBACK_TYPE=object, State=State,
+                 callback=lambda func: func)
+    _stub_module("homeassistant.config_entries", ConfigEntry=ConfigEntry)
+    _stub_module("homeassistant.exceptions", HomeAssistantError=HomeAssistantError)
+    _stub_module("homeassistant.components", __path__=[])
+    _stub_module("homeassistant.components.button", ButtonEntity=type("ButtonEntity", (Entity,), {}),
+                 ButtonDeviceClass=enum.StrEnum("ButtonDeviceClass", ["RESTART", "UPDATE", "IDENTIFY"]))
+    _stub_module("homeassistant.components.select", SelectEntity=type("SelectEntity", (Entity,), {
+        "current_option": property(lambda self: self._attr_current_option),
+    }))
+    _stub_module("homeassistant.components.switch", SwitchEntity=type("SwitchEntity", (Entity,), {}))
+    _stub_module("homeassistant.helpers", __path__=[])
+    _stub_module("homeassistant.helpers.device_registry", DeviceInfo=dict, DeviceEntry=object,
+                 async_get=async_get_device_registry)
+    _stub_module("homeassistant.helpers.entity", Entity=Entity)
+    _stub_module("homeassistant.helpers.entity_platform", AddEntitiesCallback=object, EntityPlatform=object)
+    _stub_module("homeassistant.helpers.event", async_call_later=async_call_later)
+    _stub_module("homeassistant.helpers.restore_state", RestoreEntity=RestoreEntity)
+    _stub_module("homeassistant.helpers.storage", Store=Store)
+    _stub_module("homeassistant.helpers.update_coordinator", DataUpdateCoordinator=DataUpdateCoordinator,
+                 CoordinatorEntity=CoordinatorEntity, UpdateFailed=UpdateFailed)
+
+    _bololo = _stub_module("custom_components.bololo")
+    _bololo.__path__ = [str(Path(__file__).parent.parent / "custom_components" / "bololo")]
+    _bololo.DOMAIN = "bololo"
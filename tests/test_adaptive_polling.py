@@ -0,0 +1,71 @@
+"""
+自适应轮询测试
+"""
+from datetime import timedelta
+
+from custom_components.bololo.adaptive_polling import BololoAdaptivePolling
+from custom_components.bololo.disinfection_cabinet_status import BololoDisinfectionCabinetStatus
+
+IDLE = BololoDisinfectionCabinetStatus({
+    "switch": True, "disinfection_switch": False, "dry_switch": False, "work_remain_time": 0, "status": 1,
+})
+
+
+def _working(work_remain_time: int) -> BololoDisinfectionCabinetStatus:
+    return IDLE.merge({"disinfection_switch": True, "work_remain_time": work_remain_time})
+
+
+def test_idle_backs_off_exponentially_up_to_max():
+    adaptive_polling = BololoAdaptivePolling(60, fast_interval=15, max_interval=600, backoff_factor=2)
+    intervals = [adaptive_polling.next_interval({"a": IDLE}).total_seconds() for _ in range(6)]
+    assert intervals == [60, 120, 240, 480, 600, 600]
+
+
+def test_work_state_change_resets_backoff():
+    adaptive_polling = BololoAdaptivePolling(60, fast_interval=15, max_interval=600, backoff_factor=2)
+    for _ in range(3):
+        adaptive_polling.next_interval({"a": IDLE})
+    adaptive_polling.next_interval({"a": _working(30)})
+    assert adaptive_polling.next_interval({"a": IDLE}) == timedelta(seconds=60)
+
+
+def test_reset_restarts_from_base_interval():
+    adaptive_polling = BololoAdaptivePolling(60)
+    for _ in range(3):
+        adaptive_polling.next_interval({"a": IDLE})
+    adaptive_polling.reset()
+    assert adaptive_polling.next_interval({"a": IDLE}) == timedelta(seconds=60)
+
+
+def test_working_polls_fast_without_backoff():
+    adaptive_polling = BololoAdaptivePolling(60, fast_interval=15)
+    intervals = [adaptive_polling.next_interval({"a": _working(30)}) for _ in range(3)]
+    assert intervals == [timedelta(seconds=15)] * 3
+
+
+def test_working_interval_does_not_depend_on_remaining_time():
+    adaptive_polling = BololoAdaptivePolling(60, fast_interval=15)
+    # 结束时刻的刷新由协调器单独安排，轮询间隔只看是否在工作
+    for work_remain_time in (1, 2, 10):
+        assert adaptive_polling.next_interval({"a": _working(work_remain_time), "b": IDLE}) == timedelta(seconds=15)
+
+
+def test_fast_interval_never_exceeds_base_interval():
+    adaptive_polling = BololoAdaptivePolling(10, fast_interval=15)
+    assert adaptive_polling.next_interval({"a": _working(30)}) == timedelta(seconds=10)
+
+
+def test_predict_cycle_end():
+    assert BololoAdaptivePolling.predict_cycle_end({"a": IDLE}) is None
+    assert BololoAdaptivePolling.predict_cycle_end({"a": _working(5), "b": _working(3), "c": IDLE}) == 3 * 60
+    # 电源关闭的设备不参与预测
+    assert BololoAdaptivePolling.predict_cycle_end({"a": _working(3).merge({"switch": False})}) is None
+
+
+def test_base_interval_setter_resets_backoff():
+    adaptive_polling = BololoAdaptivePolling(60)
+    for _ in range(3):
+        adaptive_polling.next_interval({"a": IDLE})
+    adaptive_polling.base_interval = 30
+    assert adaptive_polling.base_interval == 30
+    assert adaptive_polling.next_interval({"a": IDLE}) == timedelta(seconds=30)
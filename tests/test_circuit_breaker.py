@@ -0,0 +1,98 @@
+"""
+熔断器测试
+"""
+import types
+
+import pytest
+
+from custom_components.bololo import circuit_breaker as circuit_breaker_module
+from custom_components.bololo.circuit_breaker import BololoCircuitBreaker
+
+
+class FakeClock:
+    """可手动推进的 time.monotonic"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture(name="clock")
+def fixture_clock(monkeypatch) -> FakeClock:
+    clock = FakeClock()
+    monkeypatch.setattr(circuit_breaker_module, "time", types.SimpleNamespace(monotonic=clock))
+    return clock
+
+
+def _open_breaker() -> BololoCircuitBreaker:
+    circuit_breaker = BololoCircuitBreaker("test", failure_threshold=3, cooldown=60)
+    for _ in range(3):
+        assert circuit_breaker.allow_request()
+        circuit_breaker.record_failure()
+    return circuit_breaker
+
+
+def test_opens_after_consecutive_failures(clock):
+    circuit_breaker = BololoCircuitBreaker("test", failure_threshold=3, cooldown=60)
+    circuit_breaker.record_failure()
+    circuit_breaker.record_failure()
+    assert not circuit_breaker.is_open
+    circuit_breaker.record_failure()
+    assert circuit_breaker.is_open
+    assert not circuit_breaker.allow_request()
+    clock.now += 30
+    assert circuit_breaker.remaining_cooldown == pytest.approx(30)
+    assert not circuit_breaker.allow_request()
+
+
+def test_success_resets_failure_count(clock):
+    circuit_breaker = BololoCircuitBreaker("test", failure_threshold=3, cooldown=60)
+    circuit_breaker.record_failure()
+    circuit_breaker.record_failure()
+    circuit_breaker.record_success()
+    circuit_breaker.record_failure()
+    circuit_breaker.record_failure()
+    assert not circuit_breaker.is_open
+    assert circuit_breaker.allow_request()
+    assert clock.now == 1000.0
+
+
+def test_half_open_allows_single_probe(clock):
+    circuit_breaker = _open_breaker()
+    clock.now += 60
+    assert circuit_breaker.allow_request()
+    # 试探请求进行中，其余请求继续被拒绝
+    assert not circuit_breaker.allow_request()
+
+
+def test_probe_success_closes(clock):
+    circuit_breaker = _open_breaker()
+    clock.now += 60
+    assert circuit_breaker.allow_request()
+    circuit_breaker.record_success()
+    assert not circuit_breaker.is_open
+    assert circuit_breaker.allow_request()
+    assert circuit_breaker.allow_request()
+
+
+def test_probe_failure_reopens(clock):
+    circuit_breaker = _open_breaker()
+    clock.now += 60
+    assert circuit_breaker.allow_request()
+    circuit_breaker.record_failure()
+    assert circuit_breaker.is_open
+    assert circuit_breaker.remaining_cooldown == pytest.approx(60)
+    assert not circuit_breaker.allow_request()
+    clock.now += 60
+    assert circuit_breaker.allow_request()
+
+
+def test_stuck_probe_is_replaced_after_cooldown(clock):
+    circuit_breaker = _open_breaker()
+    clock.now += 60
+    assert circuit_breaker.allow_request()
+    # 试探请求一直没有结果，再过一个冷却期后放行新的试探请求
+    clock.now += 60
+    assert circuit_breaker.allow_request()
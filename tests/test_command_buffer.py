@@ -0,0 +1,134 @@
+"""
+设备控制命令队列测试
+"""
+import asyncio
+
+import pytest
+
+from custom_components.bololo.command_buffer import BololoCommandBuffer
+
+
+class FakeHass:
+    """只提供命令队列用到的事件循环"""
+
+    def __init__(self):
+        self.loop = asyncio.get_running_loop()
+
+
+class FakeConfigEntry:
+    """后台任务直接在当前事件循环中创建"""
+
+    @staticmethod
+    def async_create_background_task(_hass, target, name):
+        return asyncio.get_running_loop().create_task(target, name=name)
+
+
+class RecordingSender:
+    """记录发送的命令，每次发送等待 release 后才完成，可指定失败的批次"""
+
+    def __init__(self, fail_batches=()):
+        self.sent: list[dict] = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.release = asyncio.Event()
+        self._fail_batches = fail_batches
+
+    async def __call__(self, command_data):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        batch = len(self.sent)
+        self.sent.append(dict(command_data))
+        try:
+            await self.release.wait()
+            if batch in self._fail_batches:
+                raise RuntimeError(f"batch {batch} failed")
+        finally:
+            self.in_flight -= 1
+
+
+def _buffer(sender) -> BololoCommandBuffer:
+    return BololoCommandBuffer(FakeHass(), FakeConfigEntry(), sender, window=0.01)
+
+
+@pytest.mark.asyncio
+async def test_writes_in_window_are_merged():
+    sender = RecordingSender()
+    sender.release.set()
+    buffer = _buffer(sender)
+    await asyncio.gather(
+        buffer.async_write({"switch": True}),
+        buffer.async_write({"anion": True}),
+        buffer.async_write({"switch": False}),
+    )
+    assert sender.sent == [{"switch": False, "anion": True}]
+
+
+@pytest.mark.asyncio
+async def test_one_send_in_flight_and_superseded_writes_collapse():
+    sender = RecordingSender()
+    buffer = _buffer(sender)
+    first = asyncio.create_task(buffer.async_write({"disinfection_time": 10}))
+    while not sender.sent:
+        await asyncio.sleep(0.005)
+    # 第一批发送期间到达的写入合并为下一批，被覆盖的值不再发送
+    later = [
+        asyncio.create_task(buffer.async_write({"disinfection_time": value}))
+        for value in (20, 30, 40)
+    ]
+    await asyncio.sleep(0.05)
+    assert sender.sent == [{"disinfection_time": 10}]
+    sender.release.set()
+    await asyncio.gather(first, *later)
+    assert sender.sent == [{"disinfection_time": 10}, {"disinfection_time": 40}]
+    assert sender.max_in_flight == 1
+
+
+@pytest.mark.asyncio
+async def test_writes_complete_in_order():
+    sender = RecordingSender()
+    buffer = _buffer(sender)
+    completed = []
+
+    async def _write(index, command_data):
+        await buffer.async_write(command_data)
+        completed.append(index)
+
+    first = asyncio.create_task(_write(0, {"switch": True}))
+    while not sender.sent:
+        await asyncio.sleep(0.005)
+    second = asyncio.create_task(_write(1, {"switch": False}))
+    await asyncio.sleep(0.05)
+    assert not completed
+    sender.release.set()
+    await asyncio.gather(first, second)
+    assert completed == [0, 1]
+    # 最终发送的是最后一次写入的值
+    assert sender.sent[-1] == {"switch": False}
+
+
+@pytest.mark.asyncio
+async def test_failure_only_fails_its_own_batch():
+    sender = RecordingSender(fail_batches=(0,))
+    buffer = _buffer(sender)
+    first = asyncio.create_task(buffer.async_write({"switch": True}))
+    while not sender.sent:
+        await asyncio.sleep(0.005)
+    second = asyncio.create_task(buffer.async_write({"anion": True}))
+    sender.release.set()
+    with pytest.raises(RuntimeError):
+        await first
+    await second
+    assert sender.sent == [{"switch": True}, {"anion": True}]
+
+
+@pytest.mark.asyncio
+async def test_cancel_cancels_pending_writes():
+    sender = RecordingSender()
+    buffer = _buffer(sender)
+    write = asyncio.create_task(buffer.async_write({"switch": True}))
+    await asyncio.sleep(0)
+    buffer.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await write
+    await asyncio.sleep(0.05)
+    assert not sender.sent
@@ -0,0 +1,115 @@
+"""
+协调器轮询周期与工作周期结束刷新测试
+"""
+from datetime import timedelta
+
+import pytest
+
+from custom_components.bololo import coordinator as coordinator_module
+from custom_components.bololo.const import ADAPTIVE_POLLING_FAST_INTERVAL, CYCLE_END_REFRESH_DELAY
+
+from .common import IDLE_STATUS_INFO, FakeHass, create_discovery, device_item
+
+
+class FakeTimers:
+    """替换 async_call_later，记录每个定时器的延迟和是否被取消"""
+
+    def __init__(self):
+        self.timers: list[dict] = []
+
+    def __call__(self, _hass, delay, action):
+        timer = {"delay": delay, "action": action, "cancelled": False}
+        self.timers.append(timer)
+
+        def _cancel():
+            timer["cancelled"] = True
+
+        return _cancel
+
+    @property
+    def active(self) -> list[dict]:
+        """未取消、未到期的定时器"""
+        return [timer for timer in self.timers if not timer["cancelled"]]
+
+    async def fire(self) -> None:
+        """唯一一个未到期的定时器到期"""
+        (timer,) = self.active
+        timer["cancelled"] = True
+        await timer["action"](None)
+
+
+@pytest.fixture(name="timers")
+def fixture_timers(monkeypatch) -> FakeTimers:
+    timers = FakeTimers()
+    monkeypatch.setattr(coordinator_module, "async_call_later", timers)
+    return timers
+
+
+def _working(work_remain_time: int) -> dict:
+    return {**IDLE_STATUS_INFO, "disinfection_switch": True, "work_remain_time": work_remain_time}
+
+
+async def _setup():
+    discovery = await create_discovery(FakeHass(), "entry", [device_item(0)])
+    return discovery, discovery._coordinator, discovery._api_client  # pylint: disable=protected-access
+
+
+@pytest.mark.asyncio
+async def test_working_device_is_polled_fast(timers):
+    _, coordinator, api_client = await _setup()
+    api_client.device_status[device_item(0)["mac"]] = _working(30)
+    await coordinator.async_refresh()
+    assert coordinator.update_interval == timedelta(seconds=ADAPTIVE_POLLING_FAST_INTERVAL)
+    assert [timer["delay"] for timer in timers.active] == [30 * 60 + CYCLE_END_REFRESH_DELAY]
+
+
+@pytest.mark.asyncio
+async def test_cycle_end_refresh_does_not_depend_on_poll_interval(timers):
+    discovery, coordinator, api_client = await _setup()
+    api_client.device_status[device_item(0)["mac"]] = _working(2)
+    # 推送覆盖的设备只按校准周期拉取，结束时刻仍然单独刷新
+    discovery.devices[0].push_connected = True
+    coordinator.async_update_push_coverage()
+    await coordinator.async_refresh()
+    assert coordinator.update_interval == timedelta(seconds=coordinator.push_reconcile_interval)
+    assert [timer["delay"] for timer in timers.active] == [2 * 60 + CYCLE_END_REFRESH_DELAY]
+
+
+@pytest.mark.asyncio
+async def test_cycle_end_refresh_follows_latest_remaining_time(timers):
+    _, coordinator, api_client = await _setup()
+    mac = device_item(0)["mac"]
+    api_client.device_status[mac] = _working(10)
+    await coordinator.async_refresh()
+    api_client.device_status[mac] = _working(1)
+    await coordinator.async_refresh()
+    # 每次拉取后按最新的剩余时间重新安排，只保留一个定时器
+    assert [timer["delay"] for timer in timers.active] == [60 + CYCLE_END_REFRESH_DELAY]
+
+    api_client.device_status[mac] = IDLE_STATUS_INFO
+    await timers.fire()
+    assert api_client.status_requests == [mac] * 3
+    # 工作已结束，不再安排
+    assert not timers.active
+
+
+@pytest.mark.asyncio
+async def test_shutdown_cancels_cycle_end_refresh(timers):
+    _, coordinator, api_client = await _setup()
+    api_client.device_status[device_item(0)["mac"]] = _working(5)
+    await coordinator.async_refresh()
+    assert timers.active
+    await coordinator.async_shutdown()
+    assert not timers.active
+
+
+@pytest.mark.asyncio
+async def test_trusted_status_age_is_bounded_by_min_trusted_age_and_max_staleness():
+    discovery, coordinator, _ = await _setup()
+    bololo_device = discovery.devices[0]
+    coordinator.update_interval = timedelta(seconds=5)
+    assert coordinator.trusted_status_age(bololo_device) == coordinator.min_trusted_status_age
+    coordinator.update_interval = timedelta(seconds=120)
+    assert coordinator.trusted_status_age(bololo_device) == 120
+    coordinator.update_interval = timedelta(seconds=coordinator.status_max_staleness * 2)
+    assert coordinator.trusted_status_age(bololo_device) == coordinator.status_max_staleness
@@ -0,0 +1,37 @@
+"""
+设备发现测试
+"""
+import pytest
+
+from custom_components.bololo.disinfection_cabinet_button import DisinfectionCabinetButton
+from custom_components.bololo.disinfection_cabinet_select import DisinfectionCabinetSelect
+from custom_components.bololo.disinfection_cabinet_switch import DisinfectionCabinetSwitch
+
+from .common import FakeHass, create_discovery, device_item
+
+PLATFORM_ENTITIES = {
+    "switch": DisinfectionCabinetSwitch,
+    "button": DisinfectionCabinetButton,
+    "select": DisinfectionCabinetSelect,
+}
+
+
+@pytest.mark.asyncio
+async def test_all_platforms_are_set_up_without_devices():
+    hass = FakeHass()
+    discovery = await create_discovery(hass, "entry", [])
+    assert not discovery.devices
+    assert discovery.platforms == ["switch", "button", "select"]
+
+
+@pytest.mark.asyncio
+async def test_rediscovered_devices_are_added_through_registered_platforms():
+    hass = FakeHass()
+    discovery = await create_discovery(hass, "entry", [])
+    added_entities = []
+    for platform in discovery.platforms:
+        discovery.register_platform(platform, PLATFORM_ENTITIES[platform], added_entities.extend)
+    discovery._api_client.device_list = [device_item(0)]  # pylint: disable=protected-access
+    assert await discovery.async_rediscover() == (["did0"], [])
+    assert added_entities == discovery.devices[0].get_entities()
+    assert discovery.devices[0].last_device_status is not None
@@ -0,0 +1,95 @@
+"""
+消毒柜时长选择防抖发送测试
+"""
+import asyncio
+
+import pytest
+
+from custom_components.bololo import disinfection_cabinet_select as select_module
+from custom_components.bololo.disinfection_cabinet_function import BololoDisinfectionCabinetFunction
+from custom_components.bololo.disinfection_cabinet_select import DisinfectionCabinetSelect
+
+
+class FakeTimers:
+    """替换 async_call_later，由测试手动触发到期的定时器"""
+
+    def __init__(self):
+        self.pending: list = []
+
+    def __call__(self, _hass, _delay, action):
+        timer = [action]
+        self.pending.append(timer)
+
+        def _cancel():
+            self.pending.remove(timer)
+
+        return _cancel
+
+    def fire(self) -> asyncio.Task:
+        """触发唯一一个未到期的定时器"""
+        assert len(self.pending) == 1
+        action = self.pending.pop()[0]
+        return asyncio.get_running_loop().create_task(action(None))
+
+
+class FakeCabinet:
+    """记录发送的命令，每次发送等待 release 后才完成"""
+
+    mac = "AA:BB:CC:DD:EE:FF"
+    last_device_status = None
+
+    def __init__(self):
+        self.sent: list[dict] = []
+        self.release = asyncio.Event()
+
+    async def async_control(self, command_data):
+        self.sent.append(dict(command_data))
+        await self.release.wait()
+
+
+@pytest.fixture(name="timers")
+def fixture_timers(monkeypatch) -> FakeTimers:
+    timers = FakeTimers()
+    monkeypatch.setattr(select_module, "async_call_later", timers)
+    return timers
+
+
+def _select(cabinet: FakeCabinet) -> DisinfectionCabinetSelect:
+    entity = DisinfectionCabinetSelect(None, None, BololoDisinfectionCabinetFunction.DISINFECTION_TIME)
+    entity.set_disinfection_cabinet(cabinet)
+    entity.async_write_ha_state = lambda: None
+    return entity
+
+
+@pytest.mark.asyncio
+async def test_only_last_option_in_window_is_sent(timers):
+    cabinet = FakeCabinet()
+    cabinet.release.set()
+    entity = _select(cabinet)
+    for option in ("10", "15", "off"):
+        await entity.async_select_option(option)
+    await timers.fire()
+    assert cabinet.sent == [{"disinfection_switch": False}]
+    assert entity.current_option == "off"
+
+
+@pytest.mark.asyncio
+async def test_option_selected_while_sending_is_sent_after(timers):
+    cabinet = FakeCabinet()
+    entity = _select(cabinet)
+    await entity.async_select_option("10")
+    first = timers.fire()
+    while not cabinet.sent:
+        await asyncio.sleep(0)
+    # 第一条命令发送期间再次选择，不能被丢弃
+    await entity.async_select_option("15")
+    second = timers.fire()
+    cabinet.release.set()
+    await asyncio.gather(first, second)
+    assert cabinet.sent == [
+        {"disinfection_time": 10, "disinfection_switch": True},
+        {"disinfection_time": 15, "disinfection_switch": True},
+    ]
+    # 选择都已发送，之后的设备状态可以正常更新当前选项
+    assert entity._selected_option is None  # pylint: disable=protected-access
+    assert not timers.pending
@@ -0,0 +1,107 @@
+"""
+消毒柜状态快照测试
+"""
+import pytest
+
+from custom_components.bololo.disinfection_cabinet_function import BololoDisinfectionCabinetFunction
+from custom_components.bololo.disinfection_cabinet_status import STATUS_FIELDS, BololoDisinfectionCabinetStatus
+
+STATUS_INFO = {
+    "disinfection_time": 10,
+    "disinfection_switch": False,
+    "storage_switch": True,
+    "night_mode": False,
+    "dry_switch": False,
+    "auto_switch": False,
+    "switch": True,
+    "work_remain_time": 0,
+    "auto_time": 60,
+    "anion": None,
+    "status": 1,
+}
+
+
+def test_get_returns_function_field():
+    device_status = BololoDisinfectionCabinetStatus(STATUS_INFO)
+    assert device_status.get(BololoDisinfectionCabinetFunction.POWER) is True
+    assert device_status.get(BololoDisinfectionCabinetFunction.STORAGE) is True
+    assert device_status.get(BololoDisinfectionCabinetFunction.DISINFECTION_TIME) == 10
+    assert device_status.get(BololoDisinfectionCabinetFunction.AUTO_TIME) == 60
+
+
+def test_get_missing_and_null_fields_are_none():
+    device_status = BololoDisinfectionCabinetStatus(STATUS_INFO)
+    # 服务端返回 null 与未返回都读作 None
+    assert device_status.get(BololoDisinfectionCabinetFunction.ANION) is None
+    assert "custom_mute" not in STATUS_INFO
+    assert device_status.get_field("custom_mute") is None
+    assert device_status.get_field("unknown_field") is None
+
+
+def test_get_field_reads_unknown_fields():
+    device_status = BololoDisinfectionCabinetStatus({**STATUS_INFO, "new_field": 3})
+    assert device_status.get_field("switch") is True
+    assert device_status.get_field("new_field") == 3
+
+
+@pytest.mark.parametrize("status_info", [
+    STATUS_INFO,
+    {},
+    {**STATUS_INFO, "new_field": [1, 2]},
+    {field: index for index, field in enumerate(STATUS_FIELDS)},
+])
+def test_status_info_round_trip(status_info):
+    device_status = BololoDisinfectionCabinetStatus(status_info)
+    assert device_status.status_info == status_info
+    assert BololoDisinfectionCabinetStatus(device_status.status_info).status_info == status_info
+
+
+def test_status_info_keeps_explicit_null():
+    device_status = BololoDisinfectionCabinetStatus({"anion": None})
+    assert device_status.status_info == {"anion": None}
+
+
+def test_merge_returns_new_snapshot():
+    device_status = BololoDisinfectionCabinetStatus(STATUS_INFO)
+    merged = device_status.merge({"switch": False, "custom_mute": True, "new_field": "x"})
+    assert merged is not device_status
+    assert merged.get(BololoDisinfectionCabinetFunction.POWER) is False
+    assert merged.get_field("custom_mute") is True
+    assert merged.get_field("new_field") == "x"
+    assert merged.get_field("auto_time") == 60
+    # 原快照不变
+    assert device_status.get(BololoDisinfectionCabinetFunction.POWER) is True
+    assert device_status.status_info == STATUS_INFO
+    assert merged.status_info == {**STATUS_INFO, "switch": False, "custom_mute": True, "new_field": "x"}
+
+
+def test_changed_fields():
+    device_status = BololoDisinfectionCabinetStatus({**STATUS_INFO, "new_field": 1})
+    assert device_status.changed_fields(BololoDisinfectionCabinetStatus({**STATUS_INFO, "new_field": 1})) == set()
+    merged = device_status.merge({"switch": False, "auto_time": 60, "new_field": 2, "other_field": 0})
+    assert merged.changed_fields(device_status) == {"switch", "new_field", "other_field"}
+    assert device_status.changed_fields(merged) == {"switch", "new_field", "other_field"}
+
+
+def test_changed_fields_missing_field_differs_from_null():
+    device_status = BololoDisinfectionCabinetStatus({"anion": None})
+    assert device_status.changed_fields(BololoDisinfectionCabinetStatus({})) == {"anion"}
+
+
+def test_snapshot_has_no_instance_dict():
+    device_status = BololoDisinfectionCabinetStatus(STATUS_INFO)
+    assert not hasattr(device_status, "__dict__")
+    with pytest.raises(AttributeError):
+        device_status.switch = False
+
+
+def test_work_state():
+    idle = BololoDisinfectionCabinetStatus(STATUS_INFO)
+    assert not idle.is_working
+    assert idle.work_remain_time == 0
+    working = idle.merge({"disinfection_switch": True, "work_remain_time": 25})
+    assert working.is_working
+    assert working.work_remain_time == 25
+    assert working.work_state != idle.work_state
+    # 电源关闭时不算工作中
+    assert not working.merge({"switch": False}).is_working
@@ -0,0 +1,73 @@
+"""
+消毒柜状态快照微基准：与改造前按字段建实例属性的布局对比单个快照内存和字段读取耗时
+内存对比是确定的，默认运行；耗时对比受机器负载影响，
+运行 BOLOLO_BENCHMARK=1 pytest tests/test_disinfection_cabinet_status_benchmark.py -s 查看结果
+"""
+import gc
+import timeit
+import tracemalloc
+
+from custom_components.bololo.disinfection_cabinet_function import BololoDisinfectionCabinetFunction
+from custom_components.bololo.disinfection_cabinet_status import STATUS_FIELDS, BololoDisinfectionCabinetStatus
+
+from .common import benchmark
+
+SNAPSHOT_COUNT = 2000
+LOOKUP_NUMBER = 200000
+
+STATUS_INFO = {field: index for index, field in enumerate(STATUS_FIELDS)}
+
+
+class AttributeStatus:
+    """
+    改造前的布局：每个字段一个 _ 前缀实例属性，另存一份原始字段，读取时 getattr(status, f"_{field}")
+    """
+
+    def __init__(self, status_info):
+        self._status_info = dict(status_info)
+        for field in STATUS_FIELDS:
+            setattr(self, f"_{field.lower()}", status_info.get(field))
+
+    def get(self, function):
+        """按功能读取字段"""
+        return getattr(self, f"_{function.function_on_server}")
+
+
+def _snapshot_memory(status_cls) -> float:
+    """平均每个快照占用的字节数"""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        snapshots = [status_cls(STATUS_INFO) for _ in range(SNAPSHOT_COUNT)]
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    assert len(snapshots) == SNAPSHOT_COUNT
+    return (after - before) / SNAPSHOT_COUNT
+
+
+def _lookup_seconds(device_status) -> float:
+    """读取所有功能字段的最短耗时"""
+    functions = list(BololoDisinfectionCabinetFunction)
+
+    def _lookup():
+        for function in functions:
+            device_status.get(function)
+
+    return min(timeit.repeat(_lookup, number=LOOKUP_NUMBER // len(functions), repeat=5))
+
+
+def test_snapshot_memory_smaller_than_attribute_layout():
+    slotted = _snapshot_memory(BololoDisinfectionCabinetStatus)
+    attribute = _snapshot_memory(AttributeStatus)
+    print(f"\nper-snapshot memory : slotted {slotted:.0f} B , attribute layout {attribute:.0f} B")
+    assert slotted < attribute / 2
+
+
+@benchmark
+def test_lookup_faster_than_attribute_layout():
+    slotted = _lookup_seconds(BololoDisinfectionCabinetStatus(STATUS_INFO))
+    attribute = _lookup_seconds(AttributeStatus(STATUS_INFO))
+    print(f"\n{LOOKUP_NUMBER} lookups : slotted {slotted * 1000:.1f} ms , attribute layout {attribute * 1000:.1f} ms")
+    assert slotted < attribute
@@ -0,0 +1,46 @@
+"""
+大量消毒柜的实体创建测试：entity_id 和 unique_id 在所有设备之间唯一
+"""
+import time
+
+import pytest
+
+from custom_components.bololo.disinfection_cabinet_function import BololoDisinfectionCabinetFunction
+
+from .common import FakeHass, benchmark, create_discovery, device_item
+
+CABINET_COUNT = 300
+
+
+async def _create_entities(cabinet_count: int) -> tuple[list, float]:
+    """创建设备及其全部实体，返回实体和耗时"""
+    started_at = time.monotonic()
+    discovery = await create_discovery(FakeHass(), "entry", [device_item(index) for index in range(cabinet_count)])
+    elapsed = time.monotonic() - started_at
+    entities = [entity for bololo_device in discovery.devices for entity in bololo_device.get_entities()]
+    return entities, elapsed
+
+
+@pytest.mark.asyncio
+async def test_entity_ids_and_unique_ids_are_unique_across_cabinets():
+    entities, elapsed = await _create_entities(CABINET_COUNT)
+    print(f"\n{CABINET_COUNT} cabinets , {len(entities)} entities created in {elapsed * 1000:.1f} ms")
+    # 每个功能一个实体
+    assert len(entities) == CABINET_COUNT * len(BololoDisinfectionCabinetFunction)
+
+    entity_ids = [entity.entity_id for entity in entities]
+    unique_ids = [entity.unique_id for entity in entities]
+    assert None not in entity_ids and None not in unique_ids
+    assert len(set(entity_ids)) == len(entities)
+    assert len(set(unique_ids)) == len(entities)
+
+
+@benchmark
+@pytest.mark.asyncio
+async def test_entity_creation_scales_linearly():
+    await _create_entities(10)
+    few = min([(await _create_entities(10))[1] for _ in range(3)])
+    many = min([(await _create_entities(CABINET_COUNT))[1] for _ in range(3)])
+    print(f"\n10 cabinets : {few * 1000:.1f} ms , {CABINET_COUNT} cabinets : {many * 1000:.1f} ms")
+    # 创建设备时不遍历已有设备，耗时与设备数成线性关系
+    assert many < few * CABINET_COUNT / 10 * 2
@@ -0,0 +1,94 @@
+"""
+批量刷新设备状态测试
+"""
+import asyncio
+
+import pytest
+
+from custom_components.bololo.api_client import BololoApiClientError
+from custom_components.bololo.fleet_refresh import async_refresh_fleet_status
+
+
+class FakeDevice:
+    """刷新时记录并发数，可指定耗时和异常"""
+
+    in_flight = 0
+    max_in_flight = 0
+
+    def __init__(self, did: str, delay: float = 0.02, error: Exception | None = None):
+        self.did = did
+        self._delay = delay
+        self._error = error
+
+    async def async_refresh_device_status(self):
+        FakeDevice.in_flight += 1
+        FakeDevice.max_in_flight = max(FakeDevice.max_in_flight, FakeDevice.in_flight)
+        try:
+            await asyncio.sleep(self._delay)
+            if self._error is not None:
+                raise self._error
+            return f"status-{self.did}"
+        finally:
+            FakeDevice.in_flight -= 1
+
+
+@pytest.fixture(autouse=True)
+def _reset_in_flight():
+    FakeDevice.in_flight = 0
+    FakeDevice.max_in_flight = 0
+
+
+@pytest.mark.asyncio
+async def test_refreshes_all_devices_within_concurrency_limit():
+    devices = [FakeDevice(f"d{index}") for index in range(8)]
+    result = await async_refresh_fleet_status(devices, max_concurrency=3)
+    assert result.device_status == {f"d{index}": f"status-d{index}" for index in range(8)}
+    assert not result.errors
+    assert FakeDevice.max_in_flight == 3
+    assert set(result.latencies) == {device.did for device in devices}
+    # 并发刷新耗时明显小于串行耗时
+    assert result.elapsed < result.total_latency
+    assert result.max_latency <= result.elapsed
+
+
+@pytest.mark.asyncio
+async def test_failed_device_does_not_affect_others():
+    devices = [
+        FakeDevice("ok"),
+        FakeDevice("api_error", error=BololoApiClientError("boom")),
+        FakeDevice("timeout", error=TimeoutError()),
+    ]
+    result = await async_refresh_fleet_status(devices, max_concurrency=2)
+    assert result.device_status == {"ok": "status-ok"}
+    assert set(result.errors) == {"api_error", "timeout"}
+    assert isinstance(result.errors["api_error"], BololoApiClientError)
+    assert set(result.latencies) == {"ok", "api_error", "timeout"}
+
+
+@pytest.mark.asyncio
+async def test_unexpected_error_propagates():
+    with pytest.raises(ValueError):
+        await async_refresh_fleet_status([FakeDevice("bad", error=ValueError())], max_concurrency=1)
+
+
+@pytest.mark.asyncio
+async def test_concurrency_below_one_is_treated_as_one():
+    result = await async_refresh_fleet_status([FakeDevice("a"), FakeDevice("b")], max_concurrency=0)
+    assert set(result.device_status) == {"a", "b"}
+    assert FakeDevice.max_in_flight == 1
+
+
+@pytest.mark.asyncio
+async def test_start_jitter_spreads_requests():
+    devices = [FakeDevice(f"d{index}", delay=0) for index in range(5)]
+    result = await async_refresh_fleet_status(devices, max_concurrency=5, start_jitter=0.05)
+    assert len(result.device_status) == 5
+    assert result.elapsed < 0.5
+
+
+@pytest.mark.asyncio
+async def test_empty_fleet():
+    result = await async_refresh_fleet_status([], max_concurrency=4)
+    assert not result.device_status
+    assert not result.errors
+    assert result.max_latency == 0.0
@@ -0,0 +1,159 @@
+"""
+MQTT 状态推送与推送覆盖下的轮询测试
+"""
+import asyncio
+import json
+import os
+import time
+from datetime import timedelta
+
+import pytest
+
+from custom_components.bololo.const import FIELD_NAME_MQTT_BROKER, MQTT_STATUS_TOPIC_TEMPLATE
+from custom_components.bololo.mqtt_push import BololoMqttPushClient, get_mqtt_broker
+
+from .common import FakeHass, create_discovery, device_item
+
+# 设置为 host:port 时，连接该 MQTT broker（如本地 mosquitto）做端到端测试
+MQTT_BROKER = os.environ.get("BOLOLO_TEST_MQTT_BROKER")
+
+
+async def _setup(device_count: int = 2):
+    hass = FakeHass()
+    discovery = await create_discovery(hass, "entry", [device_item(index) for index in range(device_count)])
+    coordinator = discovery._coordinator  # pylint: disable=protected-access
+    await coordinator.async_refresh()
+    push_client = BololoMqttPushClient(hass, coordinator, "localhost", 1883)
+    return hass, discovery, coordinator, push_client
+
+
+def _age_device_status(bololo_device, seconds: float) -> None:
+    # pylint: disable=protected-access
+    bololo_device._device_status_request_timestamp_ms = int(round((time.time() - seconds) * 1000))
+
+
+@pytest.mark.asyncio
+async def test_pushed_status_is_dispatched_without_delaying_polls(monkeypatch):
+    _, discovery, coordinator, push_client = await _setup()
+    bololo_device = discovery.devices[0]
+    push_client.add_device(bololo_device)
+    schedule_refresh_calls = []
+    monkeypatch.setattr(coordinator, "_schedule_refresh", lambda: schedule_refresh_calls.append(True))
+    notified = []
+    coordinator.async_add_listener(lambda: notified.append(True))
+
+    push_client._handle_message(  # pylint: disable=protected-access
+        MQTT_STATUS_TOPIC_TEMPLATE.format(did=bololo_device.did),
+        json.dumps({"data": {"disinfection_switch": True, "work_remain_time": 20}}).encode(),
+    )
+    assert bololo_device.last_device_status.get_field("disinfection_switch") is True
+    # 未推送的字段保留之前拉取的值
+    assert bololo_device.last_device_status.get_field("switch") is True
+    assert coordinator.data[bololo_device.did] is bololo_device.last_device_status
+    assert notified
+    # 推送不能重新开始轮询计时，否则频繁推送会让其他设备一直等不到轮询
+    assert not schedule_refresh_calls
+
+
+@pytest.mark.asyncio
+async def test_invalid_and_unknown_messages_are_ignored():
+    _, discovery, coordinator, push_client = await _setup()
+    bololo_device = discovery.devices[0]
+    push_client.add_device(bololo_device)
+    device_status = bololo_device.last_device_status
+    push_client._handle_message(  # pylint: disable=protected-access
+        MQTT_STATUS_TOPIC_TEMPLATE.format(did=bololo_device.did), b"not json")
+    push_client._handle_message(  # pylint: disable=protected-access
+        MQTT_STATUS_TOPIC_TEMPLATE.format(did="unknown"), b"{}")
+    assert bololo_device.last_device_status is device_status
+    assert coordinator.data[bololo_device.did] is device_status
+
+
+@pytest.mark.asyncio
+async def test_push_coverage_switches_polling_per_device():
+    _, discovery, coordinator, push_client = await _setup()
+    covered, polled = discovery.devices
+    push_client.add_device(covered)
+    base_interval = coordinator.update_interval
+
+    push_client._set_connected(True)  # pylint: disable=protected-access
+    assert covered.push_connected
+    assert not polled.push_connected
+    # 还有设备需要轮询，按自适应周期轮询，且不超过校准周期
+    assert coordinator.update_interval == min(base_interval, timedelta(seconds=coordinator.push_reconcile_interval))
+
+    push_client.add_device(polled)
+    assert polled.push_connected
+    # 全部设备被推送覆盖，只按校准周期拉取
+    assert coordinator.update_interval == timedelta(seconds=coordinator.push_reconcile_interval)
+
+    push_client._set_connected(False)  # pylint: disable=protected-access
+    assert not covered.push_connected and not polled.push_connected
+    assert coordinator.update_interval == base_interval
+
+
+@pytest.mark.asyncio
+async def test_push_covered_devices_are_reconciled_before_max_staleness():
+    _, discovery, coordinator, push_client = await _setup()
+    covered, polled = discovery.devices
+    push_client.add_device(covered)
+    push_client._set_connected(True)  # pylint: disable=protected-access
+    api_client = discovery._api_client  # pylint: disable=protected-access
+    api_client.status_requests.clear()
+
+    # 推送的状态足够新，本周期只拉取没有推送的设备
+    await coordinator.async_refresh()
+    assert api_client.status_requests == [polled.mac]
+    assert covered.did in coordinator.data
+
+    # 状态超过校准周期的一半后拉取一次，下一次轮询最晚在一个校准周期后，状态不会超过最大陈旧时长
+    _age_device_status(covered, coordinator.push_reconcile_interval / 2)
+    api_client.status_requests.clear()
+    await coordinator.async_refresh()
+    assert sorted(api_client.status_requests) == sorted([covered.mac, polled.mac])
+    assert coordinator.push_reconcile_interval * 1.5 <= coordinator.status_max_staleness
+
+
+@pytest.mark.asyncio
+async def test_configured_broker_overrides_cluster_address():
+    _, discovery, _, _ = await _setup(1)
+    config_entry = discovery._config_entry  # pylint: disable=protected-access
+    assert get_mqtt_broker(config_entry, discovery.devices[0]) is None
+    config_entry.options = {FIELD_NAME_MQTT_BROKER: "127.0.0.1:1884"}
+    assert get_mqtt_broker(config_entry, discovery.devices[0]) == ("127.0.0.1", 1884)
+
+
+@pytest.mark.asyncio
+@pytest.mark.skipif(MQTT_BROKER is None, reason="set BOLOLO_TEST_MQTT_BROKER=host:port to test against a broker")
+async def test_status_pushed_through_broker():
+    # pylint: disable=import-outside-toplevel
+    import paho.mqtt.publish as publish
+
+    hass, discovery, coordinator, _ = await _setup(1)
+    bololo_device = discovery.devices[0]
+    host, _, port = MQTT_BROKER.partition(":")
+    push_client = BololoMqttPushClient(hass, coordinator, host, int(port or 1883))
+    push_client.add_device(bololo_device)
+    push_client.start()
+    try:
+        for _ in range(50):
+            if bololo_device.push_connected:
+                break
+            await asyncio.sleep(0.1)
+        assert bololo_device.push_connected
+        # 等待订阅生效后发布
+        await asyncio.sleep(0.5)
+        await hass.async_add_executor_job(
+            lambda: publish.single(
+                MQTT_STATUS_TOPIC_TEMPLATE.format(did=bololo_device.did),
+                json.dumps({"data": {"disinfection_switch": True}}),
+                hostname=host, port=int(port or 1883),
+            )
+        )
+        for _ in range(50):
+            if bololo_device.last_device_status.get_field("disinfection_switch"):
+                break
+            await asyncio.sleep(0.1)
+        assert coordinator.data[bololo_device.did].get_field("disinfection_switch") is True
+    finally:
+        await push_client.async_stop()
@@ -0,0 +1,58 @@
+"""
+令牌桶限流测试
+"""
+import asyncio
+import time
+
+import pytest
+
+from custom_components.bololo.rate_limiter import BololoTokenBucket
+
+
+@pytest.mark.asyncio
+async def test_burst_up_to_capacity_without_waiting():
+    token_bucket = BololoTokenBucket(rate=1, capacity=3)
+    waits = [await token_bucket.async_acquire() for _ in range(3)]
+    assert max(waits) < 0.05
+
+
+@pytest.mark.asyncio
+async def test_waits_for_refill_when_empty():
+    token_bucket = BololoTokenBucket(rate=20, capacity=1)
+    await token_bucket.async_acquire()
+    started_at = time.monotonic()
+    wait = await token_bucket.async_acquire()
+    assert wait == pytest.approx(0.05, abs=0.04)
+    assert time.monotonic() - started_at >= 0.04
+
+
+@pytest.mark.asyncio
+async def test_rate_is_respected_across_concurrent_callers():
+    token_bucket = BololoTokenBucket(rate=50, capacity=2)
+    started_at = time.monotonic()
+    await asyncio.gather(*(token_bucket.async_acquire() for _ in range(7)))
+    # 2 个突发令牌之后，其余 5 个按 50 个/秒补充
+    assert time.monotonic() - started_at >= 5 / 50 - 0.01
+
+
+@pytest.mark.asyncio
+async def test_waiters_are_served_in_arrival_order():
+    token_bucket = BololoTokenBucket(rate=100, capacity=1)
+    served = []
+
+    async def _acquire(index):
+        await token_bucket.async_acquire()
+        served.append(index)
+
+    await asyncio.gather(*(_acquire(index) for index in range(5)))
+    assert served == [0, 1, 2, 3, 4]
+
+
+@pytest.mark.asyncio
+async def test_tokens_do_not_exceed_capacity():
+    token_bucket = BololoTokenBucket(rate=100, capacity=2)
+    await asyncio.sleep(0.1)
+    await token_bucket.async_acquire()
+    await token_bucket.async_acquire()
+    # 空闲期间最多积攒 capacity 个令牌
+    assert await token_bucket.async_acquire() > 0.001
@@ -0,0 +1,97 @@
+"""
+多账号运行时数据隔离测试：每个配置条目的设备、协调器、缓存和 token 互不共享
+"""
+import asyncio
+import time
+
+import pytest
+
+from custom_components.bololo.runtime_data import BololoRuntimeData
+
+from .common import FakeHass, benchmark, create_discovery, device_item
+
+ENTRY_COUNT = 20
+DEVICES_PER_ENTRY = 10
+
+
+async def _setup_entry(hass: FakeHass, entry_id: str, device_list: list[dict]) -> BololoRuntimeData:
+    """按 async_setup_entry 的方式创建一个配置条目的运行时数据并首次刷新"""
+    discovery = await create_discovery(hass, entry_id, device_list)
+    # pylint: disable=protected-access
+    runtime_data = BololoRuntimeData(
+        discovery._api_client, discovery._token_manager, discovery._device_cache, discovery._coordinator,
+        discovery, (False, None),
+    )
+    await runtime_data.coordinator.async_refresh()
+    return runtime_data
+
+
+@pytest.mark.asyncio
+async def test_entries_do_not_share_devices():
+    hass = FakeHass()
+    first = await _setup_entry(hass, "first", [device_item(index, "a") for index in range(2)])
+    second = await _setup_entry(hass, "second", [device_item(index, "b") for index in range(3)])
+    assert first.devices is not second.devices
+    assert [bololo_device.did for bololo_device in first.devices] == ["adid0", "adid1"]
+    assert [bololo_device.did for bololo_device in second.devices] == ["bdid0", "bdid1", "bdid2"]
+    assert set(first.coordinator.data) == {"adid0", "adid1"}
+    assert set(second.coordinator.data) == {"bdid0", "bdid1", "bdid2"}
+    assert first.device_cache is not second.device_cache
+
+    # 移除一个账号的设备不影响另一个账号
+    assert await second.discovery.async_remove_device("bdid0")
+    assert len(first.devices) == 2
+    assert "bdid0" in second.device_cache.ignored_dids
+    assert not first.device_cache.ignored_dids
+
+
+@pytest.mark.asyncio
+async def test_same_device_in_two_accounts_is_tracked_per_entry():
+    hass = FakeHass()
+    first = await _setup_entry(hass, "first", [device_item(0)])
+    second = await _setup_entry(hass, "second", [device_item(0)])
+    first_device, second_device = first.devices[0], second.devices[0]
+    assert first_device is not second_device
+    # 每个账号使用自己的 token 请求
+    assert first.token_manager.user_token != second.token_manager.user_token
+    await second.discovery.async_shutdown()
+    assert first.devices == [first_device]
+    assert first_device.last_device_status is not None
+
+
+@pytest.mark.asyncio
+async def test_many_entries_set_up_concurrently():
+    hass = FakeHass()
+    started_at = time.monotonic()
+    runtime_data_list = await asyncio.gather(*(
+        _setup_entry(hass, f"entry{entry_index}",
+                     [device_item(index, f"e{entry_index}_") for index in range(DEVICES_PER_ENTRY)])
+        for entry_index in range(ENTRY_COUNT)
+    ))
+    elapsed = time.monotonic() - started_at
+    print(f"\n{ENTRY_COUNT} entries x {DEVICES_PER_ENTRY} devices set up in {elapsed * 1000:.1f} ms")
+    dids = [bololo_device.did for runtime_data in runtime_data_list for bololo_device in runtime_data.devices]
+    assert len(dids) == len(set(dids)) == ENTRY_COUNT * DEVICES_PER_ENTRY
+    for entry_index, runtime_data in enumerate(runtime_data_list):
+        assert all(did.startswith(f"e{entry_index}_") for did in runtime_data.coordinator.data)
+
+
+@benchmark
+@pytest.mark.asyncio
+async def test_concurrent_setup_scales_with_entry_count():
+    hass = FakeHass()
+
+    async def _setup_entries(entry_count: int) -> float:
+        started_at = time.monotonic()
+        await asyncio.gather(*(
+            _setup_entry(hass, f"{entry_count}_{entry_index}",
+                         [device_item(index, f"{entry_count}_{entry_index}_") for index in range(DEVICES_PER_ENTRY)])
+            for entry_index in range(entry_count)
+        ))
+        return time.monotonic() - started_at
+
+    single = min([await _setup_entries(1) for _ in range(3)])
+    many = await _setup_entries(ENTRY_COUNT)
+    print(f"\n1 entry : {single * 1000:.1f} ms , {ENTRY_COUNT} entries : {many * 1000:.1f} ms")
+    # 配置条目之间没有共享锁或全局状态，耗时随条目数线性增长
+    assert many < single * ENTRY_COUNT * 2
@@ -0,0 +1,69 @@
+"""
+配置条目卸载测试：反复设置和卸载后，设备、监听、后台任务都被释放，内存不随次数增长
+"""
+import asyncio
+import gc
+import tracemalloc
+import weakref
+
+import pytest
+
+from .common import FakeHass, async_add_entities_to_hass, async_unload, create_discovery, device_item
+
+DEVICE_COUNT = 5
+WARMUP_ROUNDS = 5
+ROUNDS = 20
+
+
+async def _setup_and_unload(hass: FakeHass) -> list[weakref.ref]:
+    """设置配置条目、控制设备后立即卸载（即重新加载同一个配置条目），返回设备、实体和协调器的弱引用"""
+    discovery = await create_discovery(hass, "entry", [device_item(index) for index in range(DEVICE_COUNT)])
+    coordinator = discovery._coordinator  # pylint: disable=protected-access
+    await coordinator.async_refresh()
+    await async_add_entities_to_hass(hass, discovery)
+    # 控制命令完成后留下进行中的确认轮询
+    await discovery.devices[0].async_control({"anion": True})
+    refs = [weakref.ref(bololo_device) for bololo_device in discovery.devices]
+    refs += [weakref.ref(entity) for entity in discovery.devices[0].get_entities()]
+    refs.append(weakref.ref(coordinator))
+
+    await async_unload(discovery)
+    assert not discovery.devices
+    assert not coordinator._listeners  # pylint: disable=protected-access
+    # 让被取消的任务执行完取消
+    await asyncio.sleep(0)
+    return refs
+
+
+def _pending_tasks() -> set[asyncio.Task]:
+    return {task for task in asyncio.all_tasks() if task is not asyncio.current_task()}
+
+
+@pytest.mark.asyncio
+async def test_unload_releases_devices_listeners_and_tasks():
+    hass = FakeHass()
+    refs = await _setup_and_unload(hass)
+    assert not _pending_tasks()
+    gc.collect()
+    assert [ref for ref in refs if ref() is not None] == []
+
+
+@pytest.mark.asyncio
+async def test_repeated_reload_does_not_grow_memory():
+    hass = FakeHass()
+    for _ in range(WARMUP_ROUNDS):
+        await _setup_and_unload(hass)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        for _ in range(ROUNDS):
+            await _setup_and_unload(hass)
+        gc.collect()
+        growth = tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+    assert not _pending_tasks()
+    # 每轮都会创建 5 台设备、45 个实体和协调器，有对象泄漏时每轮至少增长数十 KB
+    print(f"\nmemory growth after {ROUNDS} reloads : {growth} B")
+    assert growth < 20 * 1024